@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+startup.py:
+    Benchmark how long the Stasipy CLI takes to start, and make sure heavy
+        dependencies stay out of the startup path.
+
+    Run from the root of the repo:
+
+        $ python benchmarks/startup.py
+        $ python benchmarks/startup.py --runs 50 --max-ms 150
+
+    Exits non-zero if a heavy module gets imported at startup, or if any
+        command's median time goes over "--max-ms".
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+import time
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What to time. Each is run as "python -c <code>" in a fresh interpreter.
+COMMANDS = [
+    ('python', 'pass'),
+    ('stasipy', 'import sys; sys.argv = ["stasipy"]; from stasipy.cli.main import main; main()'),
+    ('stasipy generate --help', 'import stasipy.cli.generate'),
+    ('stasipy init --help', 'import stasipy.cli.init'),
+    ('stasipy batch --help', 'import stasipy.cli.batch'),
+    ('stasipy client --help', 'import stasipy.cli.client'),
+]
+
+# Modules that are slow to import, and are only needed once we actually
+#   render something (or run "init").
+HEAVY_MODULES = [
+    'pkg_resources',
+    'jinja2',
+    'markdown2',
+    'numpy',
+    'scipy',
+    'PIL',
+]
+
+
+def time_command(code, runs):
+    """
+    Time a snippet of Python in a fresh interpreter.
+
+    Args:
+        code (str):     The code to run.
+        runs (int):     How many times to run it.
+
+    Returns:
+        list:           Wall clock time of each run, in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=REPO_PATH, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def heavy_imports(code):
+    """
+    Find out which heavy modules a snippet of Python imports.
+
+    Args:
+        code (str):     The code to run.
+
+    Returns:
+        list
+    """
+    check = '{0}\nimport sys\nprint("heavy:" + ",".join(m for m in {1!r} if m in sys.modules))'.format(
+        code, HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', check], cwd=REPO_PATH, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('heavy:'):
+            return [m for m in line[len('heavy:'):].split(',') if m]
+
+    return []
+
+
+def main():
+    """
+    Run the benchmark.
+
+    Returns:
+        int:    The exit code.
+    """
+    parser = argparse.ArgumentParser('Benchmark Stasipy CLI startup.')
+    parser.add_argument('--runs', type=int, default=20, help='Runs per command.')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='Fail if any command\'s median startup time is over this.')
+    args = parser.parse_args()
+
+    failed = False
+    print('{0:<28} {1:>10} {2:>10} {3:>10}  {4}'.format('command', 'median ms', 'min ms', 'max ms', 'heavy imports'))
+    for name, code in COMMANDS:
+        timings = time_command(code, args.runs)
+        median = statistics.median(timings)
+        heavy = heavy_imports(code) if name != 'python' else []
+        print('{0:<28} {1:>10.1f} {2:>10.1f} {3:>10.1f}  {4}'.format(
+            name, median, min(timings), max(timings), ', '.join(heavy) or '-'))
+
+        if heavy:
+            failed = True
+        if args.max_ms is not None and name != 'python' and median > args.max_ms:
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 
 import os
-from setuptools import setup
+from setuptools import setup, find_packages
 
 
 def read(fname):
@@ -25,7 +25,7 @@ def get_requirements():
     Returns:
         list
     """
-    return read('requirements.txt').split('\n')
+    return [r for r in read('requirements.txt').split('\n') if r]
 
 
 setup(name='stasipy',
@@ -34,7 +34,9 @@ setup(name='stasipy',
       long_description=read('README.md'),
       author='Corwin Brown',
       author_email='corwin@corwinbrown.com',
-      packages=['stasipy'],
+      packages=find_packages(),
+      package_data={'stasipy': ['template_site/*', 'template_site/**/*']},
+      python_requires='>=3.8',
       scripts=['bin/stasipy'],
       install_requires=get_requirements(),
       platform='all')
@@ -0,0 +1,225 @@
+"""
+api.py:
+    A static JSON API of a site's posts.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import re
+import json
+import posixpath
+
+import stasipy.utils as utils
+from stasipy.defaults import StasipyDefaults
+
+_slug_pattern = re.compile(r'[^\w]+')
+
+
+def register(pipeline):
+    """
+    Hook the JSON API into a build. Stasipy does this itself when the site
+        config has a "json_api" section.
+
+    Args:
+        pipeline (BuildPipeline):   The build's pipeline.
+    """
+    config = pipeline.site_vars.get('json_api')
+    api = JsonApi(config if isinstance(config, dict) else {})
+    pipeline.add_hook('write', api.write_site, name='stasipy.api')
+
+
+class JsonApi(object):
+    """
+    Writes a site's posts out as JSON, for anything that would rather not
+        scrape the HTML:
+
+        api/posts/index.json            How many posts and pages there are.
+        api/posts/<page>.json           A page of post summaries.
+        api/post/<relative_path>.json   A post, with its rendered body.
+        api/<taxonomy>/index.json       Every term, and how many posts have it.
+        api/<taxonomy>/<term>/<page>.json
+
+    Listings are ordered oldest post first, the same as the posts list meta
+        pages get, so a new post only touches the last page of a listing.
+        Everything goes through the sink, so files that come out the same as
+        the last build aren't rewritten.
+    """
+
+    def __init__(self, config):
+        """
+        Constructor
+
+        Args:
+            config (dict):  The "json_api" section of the site config.
+        """
+        self.path = str(config.get('path', StasipyDefaults.json_api_path)).strip('/')
+        self.page_size = max(int(config.get('page_size', StasipyDefaults.json_api_page_size)), 1)
+        self.taxonomies = list(config.get('taxonomies', StasipyDefaults.json_api_taxonomies))
+
+    def write_site(self, context):
+        """
+        Write out the API for every locale in a build.
+
+        Args:
+            context (PipelineContext):  The build.
+        """
+        for build in context.builds:
+            self.write_posts(context.sink, build.locale, build.posts)
+            # Listings need every post's summary, which targeted and sharded
+            #   builds don't always have.
+            if all(p.summary is not None for p in build.all_posts):
+                posts_list = sorted((p.__dict__ for p in build.all_posts), key=lambda p: p['date'])
+                self.write_listings(context.sink, build.locale, posts_list)
+
+    def write_posts(self, sink, locale, posts):
+        """
+        Write out a JSON document for each post.
+
+        Args:
+            sink (OutputSink):  The sink to write to.
+            locale (Locale):    The locale the posts were rendered for.
+            posts (list):       Prepared Document objects.
+        """
+        for post in posts:
+            record = self._summary_record(locale, post.__dict__)
+            record['content'] = str(post.content)
+            record['metadata'] = post.metadata
+            record['related'] = [self._post_href(locale, r) for r in post.related]
+            sink.write(locale.output_path(self._post_relpath(post.relative_path)), self._dumps(record))
+
+    def write_listings(self, sink, locale, posts_list):
+        """
+        Write out the paginated post index, and a listing for every term of
+            every taxonomy.
+
+        Args:
+            sink (OutputSink):  The sink to write to.
+            locale (Locale):    The locale the posts were rendered for.
+            posts_list (list):  Every post's template variables, oldest
+                                    first.
+        """
+        records = [self._summary_record(locale, p) for p in posts_list]
+        self._write_paginated(sink, locale, 'posts', records)
+
+        for taxonomy in self.taxonomies:
+            # Terms are grouped regardless of case, so "Python" and "python"
+            #   share a listing, and the first spelling seen names it.
+            #   Different terms that come out as the same slug get a suffix,
+            #   rather than sharing a listing.
+            names = {}
+            slugs = {}
+            terms = {}
+            for post, record in zip(posts_list, records):
+                for term in utils.parse_terms(post['metadata'].get(taxonomy)):
+                    folded = term.casefold()
+                    slug = slugs.get(folded)
+                    if slug is None:
+                        slug = self._unique_slug(self._slug(term), terms)
+                        slugs[folded] = slug
+                        names[slug] = term
+                    term_records = terms.setdefault(slug, [])
+                    if not term_records or term_records[-1] is not record:
+                        term_records.append(record)
+
+            index = {}
+            for slug, term_records in sorted(terms.items()):
+                listing_path = posixpath.join(taxonomy, slug)
+                index[slug] = {
+                    'name': names[slug],
+                    'count': len(term_records),
+                    'href': self._href(locale, posixpath.join(listing_path, 'index.json')),
+                }
+                self._write_paginated(sink, locale, listing_path, term_records)
+            sink.write(locale.output_path(posixpath.join(self.path, taxonomy, 'index.json')),
+                       self._dumps({'terms': index}))
+
+    def _write_paginated(self, sink, locale, listing_path, records):
+        """
+        Split a listing into pages, and write out each page and an index
+            of them.
+        """
+        pages = [records[i:i + self.page_size] for i in range(0, len(records), self.page_size)] or [[]]
+        hrefs = [self._href(locale, posixpath.join(listing_path, '{0}.json'.format(n)))
+                 for n in range(1, len(pages) + 1)]
+
+        for number, page in enumerate(pages, start=1):
+            sink.write(locale.output_path(posixpath.join(self.path, listing_path, '{0}.json'.format(number))),
+                       self._dumps({
+                           'page': number,
+                           'pages': len(pages),
+                           'prev': hrefs[number - 2] if number > 1 else None,
+                           'next': hrefs[number] if number < len(pages) else None,
+                           'posts': page,
+                       }))
+
+        sink.write(locale.output_path(posixpath.join(self.path, listing_path, 'index.json')),
+                   self._dumps({'total': len(records), 'page_size': self.page_size, 'pages': hrefs}))
+
+    def _summary_record(self, locale, post_vars):
+        """
+        What listings say about a post.
+
+        Args:
+            locale (Locale):    The locale the post was rendered for.
+            post_vars (dict):   The post's template variables.
+
+        Returns:
+            dict
+        """
+        return {
+            'title': post_vars['title'],
+            'author': post_vars['author'],
+            'date': post_vars['date'].isoformat(),
+            'date_str': post_vars['date_str'],
+            'href': post_vars['href'],
+            'api_href': self._post_href(locale, post_vars),
+            'summary': post_vars['summary'],
+        }
+
+    def _post_href(self, locale, post_vars):
+        """
+        Where a post's JSON document can be fetched from.
+        """
+        return self._href(locale, posixpath.join('post', '{0}.json'.format(post_vars['relative_path'])))
+
+    def _post_relpath(self, relative_path):
+        """
+        Where a post's JSON document is written, relative to the output
+            directory.
+        """
+        return posixpath.join(self.path, 'post', '{0}.json'.format(relative_path))
+
+    def _href(self, locale, relpath):
+        """
+        The href of a file in the API.
+        """
+        return locale.href('/{0}/{1}'.format(self.path, relpath))
+
+    @staticmethod
+    def _slug(term):
+        """
+        Turn a term into something safe to use in a path. Letters and digits
+            of any script are kept.
+        """
+        return _slug_pattern.sub('-', term.lower()).strip('-') or 'untitled'
+
+    @staticmethod
+    def _unique_slug(slug, taken):
+        """
+        Add a suffix to a slug another term already has.
+        """
+        unique = slug
+        number = 2
+        while unique in taken:
+            unique = '{0}-{1}'.format(slug, number)
+            number += 1
+
+        return unique
+
+    @staticmethod
+    def _dumps(data):
+        """
+        Serialize a JSON document. Keys are sorted, so the same data always
+            comes out byte for byte the same.
+        """
+        return json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
@@ -0,0 +1,346 @@
+"""
+bundles.py:
+    Concatenates (and optionally minifies) groups of CSS and JavaScript files
+        in "static" into single bundles.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import re
+import glob
+import json
+import fnmatch
+import hashlib
+import posixpath
+from html import escape
+
+import stasipy.utils as utils
+from stasipy.errors import StasipyException
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# Where bundles can be declared, if not in "siteconfig.yml". Relative to
+#   "static".
+MANIFEST_NAME = 'bundles.yml'
+
+# Bundles are written here, relative to "src".
+BUNDLES_PATH = 'static/bundles'
+
+BUNDLE_TYPES = ('.css', '.js')
+
+# Strings and comments, which whitespace rules must not reach into.
+_CSS_STRING_OR_COMMENT = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)''', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+# Not before a colon, where "a :hover" and "a:hover" differ.
+_CSS_COLON = re.compile(r':\s+')
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def minify_css(css):
+    """
+    A conservative CSS minifier: strips comments (except "/*! ... */" ones)
+        and any whitespace that can't matter. Strings are left exactly as
+        they are.
+
+    Args:
+        css (str):  The CSS to minify.
+
+    Returns:
+        str
+    """
+    parts = []
+    code = []
+    position = 0
+    for match in _CSS_STRING_OR_COMMENT.finditer(css):
+        code.append(css[position:match.start()])
+        position = match.end()
+        string, comment = match.groups()
+        if string is None and not comment.startswith('/*!'):
+            continue
+        parts.append(_minify_css_code(''.join(code)))
+        parts.append(match.group(0))
+        code = []
+    code.append(css[position:])
+    parts.append(_minify_css_code(''.join(code)))
+
+    return ''.join(parts).strip()
+
+
+def _minify_css_code(css):
+    """
+    Strip the whitespace that can't matter from CSS with no strings or
+        comments in it.
+    """
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = _CSS_COLON.sub(':', css)
+    return css.replace(';}', '}')
+
+
+def minify_js(js):
+    """
+    Minify JavaScript, with "rjsmin".
+
+    Args:
+        js (str):   The JavaScript to minify.
+
+    Returns:
+        str
+    """
+    if rjsmin is None:
+        raise StasipyException('Minifying JavaScript requires rjsmin. Try "pip install rjsmin", '
+                               'or set "minify: false" on the bundle.')
+
+    return rjsmin.jsmin(js)
+
+
+def _rebase_urls(css, relpath):
+    """
+    Make the relative "url()"s in a stylesheet absolute, since the bundle it
+        ends up in lives somewhere else.
+
+    Args:
+        css (str):      The stylesheet.
+        relpath (str):  Where it lives, relative to "src".
+
+    Returns:
+        str
+    """
+    base = posixpath.dirname('/{0}'.format(relpath))
+
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(('/', '#', 'data:')) or re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*://', url):
+            return match.group(0)
+        return 'url({0}{1}{0})'.format(quote, posixpath.normpath(posixpath.join(base, url)))
+
+    return _CSS_URL.sub(rebase, css)
+
+
+class Bundle(object):
+    """
+    A bundle, as templates see it. Renders as the tag that loads it:
+
+        {{ bundle('site.css') }}
+        {{ bundle('site.js').tag(defer='defer') }}
+    """
+
+    def __init__(self, name, href, inputs):
+        """
+        Constructor
+
+        Args:
+            name (str):     The bundle's name.
+            href (str):     Where the bundle is served from.
+            inputs (list):  Hrefs of the files it was made from, in order.
+        """
+        self.name = name
+        self.href = href
+        self.inputs = inputs
+
+    def tag(self, **attrs):
+        """
+        Render out a <link> tag for a stylesheet, or a <script> tag.
+
+        Args:
+            attrs (dict):   Any other attributes to add to the tag.
+
+        Returns:
+            str
+        """
+        if self.href.endswith('.css'):
+            tag_attrs = [('rel', 'stylesheet'), ('href', self.href)] + sorted(attrs.items())
+            return '<link {0}>'.format(self._attrs(tag_attrs))
+
+        tag_attrs = [('src', self.href)] + sorted(attrs.items())
+        return '<script {0}></script>'.format(self._attrs(tag_attrs))
+
+    @staticmethod
+    def _attrs(tag_attrs):
+        return ' '.join('{0}="{1}"'.format(k, escape(str(v))) for k, v in tag_attrs)
+
+    def __str__(self):
+        return self.tag()
+
+
+class BundlePipeline(object):
+    """
+    Builds bundles from groups of files in "static". A bundle's type comes
+        from its name, so "site.css" is a stylesheet and "site.js" a script.
+
+    Bundles are cached on disk, keyed by a hash of their inputs and settings,
+        so a bundle is only rebuilt when one of its inputs (or the list of
+        them) changes. Inputs are only re-hashed when their size or mtime
+        change. The key is also part of the bundle's filename, so browsers
+        can cache bundles forever.
+    """
+
+    def __init__(self, cache_path, bundles, minify=False):
+        """
+        Constructor
+
+        Args:
+            cache_path (str):   Where to keep built bundles between builds.
+            bundles (dict):     Bundle name to either a list of globs,
+                                    relative to "static", or a dict with
+                                    "files" (the globs) and "minify".
+            minify (bool):      Whether to minify bundles that don't say.
+        """
+        if not isinstance(bundles, dict):
+            raise StasipyException('"bundles" should map bundle names to lists of files.')
+
+        self.cache_path = cache_path
+        self.index_path = os.path.join(cache_path, 'index.json')
+        self.bundles = []
+        for name, spec in sorted(bundles.items()):
+            if not isinstance(spec, dict):
+                spec = {'files': spec}
+            files = spec.get('files') or []
+            if isinstance(files, str):
+                files = [files]
+            if os.path.splitext(name)[1].lower() not in BUNDLE_TYPES:
+                raise StasipyException('Bundle "{0}" should be named for its type: one of {1}'.format(
+                    name, ', '.join(BUNDLE_TYPES)))
+            self.bundles.append((name, files, bool(spec.get('minify', minify))))
+
+    def process(self, static_files):
+        """
+        Build every bundle, unless it's already cached.
+
+        Args:
+            static_files (list):    DiscoveredFile objects for everything in
+                                        "static".
+
+        Returns:
+            tuple:  (bundles, bundle_files), where bundles maps each bundle's
+                        name to a Bundle, and bundle_files is a list of
+                        (relpath, cached_path) tuples to copy into the output
+                        directory.
+        """
+        utils.ensure_directory_exists(self.cache_path)
+        previous_index = self._read_index()
+        index = {}
+        bundles = {}
+        bundle_files = []
+
+        for name, patterns, minify in self.bundles:
+            inputs = self._match(name, patterns, static_files)
+
+            key = hashlib.sha1()
+            key.update(json.dumps([name, minify]).encode('utf-8'))
+            for static_file in inputs:
+                source = self._source_info(static_file, previous_index.get(static_file.relpath))
+                index[static_file.relpath] = source
+                key.update('\0{0}:{1}'.format(static_file.relpath, source['hash']).encode('utf-8'))
+            key = key.hexdigest()
+
+            stem, ext = os.path.splitext(name)
+            cached_path = os.path.join(self.cache_path, '{0}{1}'.format(key, ext))
+            if not os.path.isfile(cached_path):
+                utils.write_text_atomic(cached_path, self._build(ext.lower(), inputs, minify))
+
+            relpath = '{0}/{1}-{2}{3}'.format(BUNDLES_PATH, stem, key[:12], ext)
+            bundle_files.append((relpath, cached_path))
+            bundles[name] = Bundle(name, '/{0}'.format(relpath), ['/{0}'.format(f.relpath) for f in inputs])
+
+        self._write_index(index)
+        self._prune(cached_path for _, cached_path in bundle_files)
+        return bundles, bundle_files
+
+    @staticmethod
+    def _match(name, patterns, static_files):
+        """
+        Find a bundle's inputs. Every glob has to match something, and files
+            are taken in the order their globs are listed, then by name.
+        """
+        by_relpath = dict((posixpath.relpath(f.relpath, 'static'), f) for f in static_files)
+        inputs = []
+        seen = set()
+        for pattern in patterns:
+            pattern = pattern.lstrip('/')
+            if pattern.startswith('static/'):
+                pattern = pattern[len('static/'):]
+            matches = sorted(relpath for relpath in by_relpath if fnmatch.fnmatchcase(relpath, pattern))
+            if not matches:
+                raise StasipyException('Bundle "{0}": Nothing in "static" matches "{1}"'.format(name, pattern))
+            for relpath in matches:
+                if relpath not in seen:
+                    seen.add(relpath)
+                    inputs.append(by_relpath[relpath])
+
+        if not inputs:
+            raise StasipyException('Bundle "{0}" has no files.'.format(name))
+
+        return inputs
+
+    @staticmethod
+    def _build(ext, inputs, minify):
+        """
+        Concatenate a bundle's inputs, minifying if asked.
+        """
+        parts = []
+        for static_file in inputs:
+            with open(static_file.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if ext == '.css':
+                content = _rebase_urls(content, static_file.relpath)
+            parts.append(content.strip())
+
+        if ext == '.css':
+            content = '\n'.join(parts)
+            return minify_css(content) if minify else content + '\n'
+
+        # A semicolon between scripts, in case one leaves its last statement
+        #   unterminated.
+        content = '\n;\n'.join(parts)
+        return minify_js(content) if minify else content + '\n'
+
+    @staticmethod
+    def _source_info(static_file, previous):
+        """
+        Get the hash of an input, reusing what we knew last time if the file
+            hasn't been touched.
+        """
+        stat = static_file.stat
+        if previous is not None and previous['mtime'] == stat.st_mtime and previous['size'] == stat.st_size:
+            return previous
+
+        return {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'hash': utils.hash_file(static_file.path),
+        }
+
+    def _prune(self, keep):
+        """
+        Remove bundles that no longer match their inputs.
+        """
+        keep = set(keep)
+        keep.add(self.index_path)
+        for path in glob.glob(os.path.join(self.cache_path, '*')):
+            if path not in keep and os.path.splitext(path)[1].lower() in BUNDLE_TYPES:
+                os.unlink(path)
+
+    def _read_index(self):
+        """
+        Read what we knew about each input last build.
+        """
+        if not utils.file_exists(self.index_path):
+            return {}
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                return {}
+
+    def _write_index(self, index):
+        """
+        Write out what we know about each input.
+        """
+        utils.write_json_atomic(self.index_path, index)
@@ -0,0 +1,154 @@
+"""
+cache.py:
+    On disk cache of Markdown conversions.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+
+class MarkdownCache(object):
+    """
+    Converted Markdown, stored on disk so that documents that haven't
+        changed aren't converted again on the next build.
+
+    Entries are keyed by a hash of the Markdown source, and of the engine
+        (name, version, and extras) that converted it, so upgrading or
+        reconfiguring the engine never hands back stale HTML. Every entry is
+        its own file, written to a temp file and renamed into place, so
+        any number of builds (or sites, or CI runners) can share one cache
+        directory without locking.
+
+    Reading an entry bumps its mtime, and "prune" evicts the least recently
+        used entries until the cache is under its size limit.
+    """
+
+    def __init__(self, path, max_size, engine):
+        """
+        Constructor
+
+        Args:
+            path (str):         The directory to keep entries in.
+            max_size (int):     How large the cache may grow, in bytes.
+            engine (str):       Identifies the Markdown engine, version and
+                                    extras. Part of every key.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, md_content):
+        """
+        Look up a conversion.
+
+        Args:
+            md_content (str):   The Markdown source.
+
+        Returns:
+            tuple:  (metadata, html), or None on a miss.
+        """
+        entry_path = self._entry_path(md_content)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            # Missing, evicted out from under us, or half written by
+            #   something that wasn't us. Either way, convert it again.
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return entry['metadata'], entry['html']
+
+    def put(self, md_content, metadata, html):
+        """
+        Store a conversion.
+
+        Args:
+            md_content (str):   The Markdown source.
+            metadata (dict):    The metadata parsed out of the source.
+            html (str):         The converted HTML.
+        """
+        entry_path = self._entry_path(md_content)
+        entry_dir = os.path.dirname(entry_path)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=entry_dir, prefix='.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'metadata': metadata, 'html': str(html)}, f)
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError):
+            # The cache is only ever an optimization. If it's read only, full,
+            #   or the metadata can't be serialized, just don't cache.
+            pass
+
+    def prune(self):
+        """
+        Evict the least recently used entries until the cache fits in its
+            size limit.
+
+        Returns:
+            int:    How many entries were evicted.
+        """
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.path):
+            for fname in files:
+                if not fname.endswith('.json'):
+                    continue
+                entry_path = os.path.join(root, fname)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+                total_size += stat.st_size
+
+        evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(entry_path)
+                evicted += 1
+            except OSError:
+                # Someone sharing the cache already got to it.
+                pass
+            total_size -= size
+
+        return evicted
+
+    def _entry_path(self, md_content):
+        """
+        Where the entry for some Markdown lives. Entries are spread across
+            subdirectories, so no one directory gets too big.
+        """
+        key = hashlib.sha1()
+        key.update(self.engine.encode('utf-8'))
+        key.update(b'\0')
+        key.update(md_content.encode('utf-8'))
+        digest = key.hexdigest()
+        return os.path.join(self.path, digest[:2], '{0}.json'.format(digest))
+
+    def _count(self, hit):
+        """
+        Keep track of hits and misses, which may come from any thread.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
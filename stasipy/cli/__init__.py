@@ -11,11 +11,12 @@ from abc import ABCMeta, abstractmethod
 import argparse
 
 
-class StasipyCLI(object):
-    __metaclass__ = ABCMeta
-
+class StasipyCLI(metaclass=ABCMeta):
     _description = None
 
+    # How many site paths this command accepts. Follows argparse's "nargs".
+    _site_path_nargs = None
+
     def __init__(self, args):
         """
         Constructor.
@@ -41,6 +42,7 @@ class StasipyCLI(object):
 
         parser.add_argument('site_path',
                             type=str,
+                            nargs=self._site_path_nargs,
                             metavar='SITE-PATH',
                             help='The path to the site you wish to reference.')
         parser.add_argument('-v', '--verbose',
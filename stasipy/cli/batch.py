@@ -0,0 +1,142 @@
+"""
+batch.py:
+    Class for the 'batch' subcommand.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import glob
+import time
+
+from stasipy.stasipy import Stasipy
+from stasipy.pools import WorkerPools
+from stasipy.cli import StasipyCLI
+
+
+class StasipyBatch(StasipyCLI):
+    """
+    CLI command to generate many sites in one process.
+
+    Everything that is safe to share between sites (compiled templates,
+        Markdown converters, the output writer threads and image encoding
+        processes) lives for the life of the process, so only the first
+        site pays to set it up. Each site still gets its own
+        Stasipy object, so "site_vars" and results never leak between
+        sites.
+    """
+
+    _description = 'Generate many sites in one process.'
+    _site_path_nargs = '+'
+
+    def __init__(self, args):
+        """
+        Constructor
+
+        Args:
+            args (str):     Command line args to parse (Think "sys.argv[1:]")
+        """
+        super().__init__(args=args)
+
+    def parse(self):
+        """
+        Parse CLI args.
+        """
+        self.parsed_args = self.parser.parse_args(self.args)
+
+    def run(self):
+        """
+        Execute.
+
+        Returns:
+            int:    0 if every site built, 1 otherwise.
+        """
+        site_paths = self._expand_site_paths(self.parsed_args.site_path)
+        if not site_paths:
+            print('No sites found matching: {0}'.format(', '.join(self.parsed_args.site_path)))
+            return 1
+
+        batch_start = time.time()
+        results = []
+        pools = WorkerPools()
+        try:
+            for site_path in site_paths:
+                results.append(self._generate_site(site_path, pools))
+        finally:
+            pools.close()
+
+        print(self._format_report(results, time.time() - batch_start))
+
+        return 1 if any(error for _, error, _ in results) else 0
+
+    def _expand_site_paths(self, patterns):
+        """
+        Expand a list of site paths and/or globs into a list of site
+            directories, preserving order and dropping duplicates.
+
+        Args:
+            patterns (list):    Site paths or globs to expand.
+
+        Returns:
+            list
+        """
+        site_paths = []
+        for pattern in patterns:
+            for site_path in sorted(glob.glob(os.path.expanduser(pattern))):
+                site_path = os.path.abspath(site_path)
+                if os.path.isdir(site_path) and site_path not in site_paths:
+                    site_paths.append(site_path)
+
+        return site_paths
+
+    def _generate_site(self, site_path, pools):
+        """
+        Generate a single site.
+
+        Args:
+            site_path (str):        The path to the site to generate.
+            pools (WorkerPools):    Worker pools shared by every site.
+
+        Returns:
+            tuple:              (site_path, error, duration)
+        """
+        start = time.time()
+        error = None
+        try:
+            stasipy = Stasipy(
+                base_site_path=site_path,
+                verbose_mode=self.parsed_args.verbose,
+                skip_confirm=self.parsed_args.skip_confirm,
+                pools=pools,
+            )
+            if stasipy.generate():
+                error = 'Generation failed.'
+        except Exception as e:
+            # One broken site shouldn't take down the rest of the batch.
+            error = '{0}'.format(e) or e.__class__.__name__
+
+        return site_path, error, time.time() - start
+
+    def _format_report(self, results, duration):
+        """
+        Create a human friendly report of how each site went.
+
+        Args:
+            results (list):     (site_path, error, duration) tuples.
+            duration (float):   How long the whole batch took.
+
+        Returns:
+            str
+        """
+        lines = ['Batch results:']
+        for site_path, error, site_duration in results:
+            line = '  {0:<7} {1:>7.2f}s  {2}'.format('FAILED' if error else 'OK', site_duration, site_path)
+            if error:
+                line = '{0}: {1}'.format(line, error)
+            lines.append(line)
+
+        failed = len([error for _, error, _ in results if error])
+        lines.append('{0} sites built, {1} failed in {2:.2f}s.'.format(
+            len(results) - failed, failed, duration))
+
+        return '\n'.join(lines)
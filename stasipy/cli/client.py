@@ -0,0 +1,130 @@
+"""
+client.py:
+    Class for the 'client' subcommand.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import sys
+
+from stasipy.daemon import default_socket_path, send_request
+from stasipy.cli import StasipyCLI
+
+
+class StasipyClient(StasipyCLI):
+    """
+    CLI command to ask a running "stasipy daemon" to build its site.
+
+    This only imports what it needs to talk to the daemon, so it starts
+        about as fast as Python itself.
+    """
+
+    _description = 'Ask a running "stasipy daemon" to build a site.'
+
+    def __init__(self, args):
+        """
+        Constructor
+
+        Args:
+            args (str):     Command line args to parse (Think "sys.argv[1:]")
+        """
+        super().__init__(args=args)
+
+    def parse(self):
+        """
+        Parse CLI args.
+        """
+        self.parser.add_argument('--socket',
+                                 type=str,
+                                 metavar='SOCKET-PATH',
+                                 help='Where the daemon listens, instead of ".stasipy/daemon.sock" in the site.')
+        self.parser.add_argument('--manifest',
+                                 type=str,
+                                 metavar='MANIFEST-PATH',
+                                 help='Where to write the manifest of changed output files.')
+        self.parser.add_argument('--output',
+                                 type=str,
+                                 metavar='OUTPUT-PATH',
+                                 help='Where to write the site, instead of "out".')
+        self.parser.add_argument('--only',
+                                 action='append',
+                                 metavar='PATH-OR-GLOB',
+                                 help='Only build documents and static files matching this path '
+                                      'or glob. May be given more than once.')
+        self.parser.add_argument('--since',
+                                 type=str,
+                                 metavar='DATE',
+                                 help='Only build source files modified at or after this date.')
+        self.parser.add_argument('--status',
+                                 action='store_true',
+                                 default=False,
+                                 help='Report on the daemon, instead of building.')
+        self.parser.add_argument('--stop',
+                                 action='store_true',
+                                 default=False,
+                                 help='Stop the daemon, instead of building.')
+
+        self.parsed_args = self.parser.parse_args(self.args)
+        if self.parsed_args.status and self.parsed_args.stop:
+            self.parser.error('--status can not be combined with --stop.')
+
+    def run(self):
+        """
+        Execute.
+
+        Returns:
+            int:    The exit code of the build.
+        """
+        socket_path = self.parsed_args.socket or default_socket_path(self.parsed_args.site_path)
+        if self.parsed_args.status:
+            request = {'command': 'status'}
+        elif self.parsed_args.stop:
+            request = {'command': 'stop'}
+        else:
+            # The daemon doesn't share our working directory.
+            request = {
+                'command': 'generate',
+                'only': self._only_paths(self.parsed_args.only),
+                'since': self.parsed_args.since,
+                'output': self._absolute_path(self.parsed_args.output),
+                'manifest': self._absolute_path(self.parsed_args.manifest),
+                'verbose': self.parsed_args.verbose,
+            }
+
+        response = send_request(socket_path, request)
+        sys.stdout.write(response.get('output', ''))
+        if response.get('documents'):
+            print('Built in {0:.1f}ms: {1} documents reused, {2} read.{3}'.format(
+                response['timings']['total'], response['documents']['reused'], response['documents']['read'],
+                ' {0}'.format(response['summary']) if response.get('summary') else ''))
+            if self.parsed_args.verbose:
+                for phase, ms in sorted(response['timings'].items()):
+                    if phase != 'total':
+                        print('  {0:<12} {1:>8.1f}ms'.format(phase, ms))
+        elif 'timings' in response:
+            print('Failed after {0:.1f}ms.'.format(response['timings']['total']))
+
+        return response.get('status', 1)
+
+    @staticmethod
+    def _only_paths(only):
+        """
+        Make the "--only" arguments that exist here absolute, so they match
+            the same files in the daemon. Globs and hrefs are sent as is.
+        """
+        if only is None:
+            return None
+
+        return [os.path.abspath(os.path.expanduser(p)) if os.path.exists(os.path.expanduser(p)) else p
+                for p in only]
+
+    @staticmethod
+    def _absolute_path(path):
+        """
+        Make a path from the command line absolute, keeping None as is.
+        """
+        if path is None or path == ':memory:':
+            return path
+
+        return os.path.abspath(os.path.expanduser(path))
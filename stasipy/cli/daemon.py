@@ -0,0 +1,59 @@
+"""
+daemon.py:
+    Class for the 'daemon' subcommand.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import sys
+import signal
+
+from stasipy.daemon import BuildDaemon
+from stasipy.cli import StasipyCLI
+
+
+class StasipyDaemon(StasipyCLI):
+    """
+    CLI command to keep a site warm in memory, and build it on request.
+    """
+
+    _description = 'Run a build server for a site, for "stasipy client" to talk to.'
+
+    def __init__(self, args):
+        """
+        Constructor
+
+        Args:
+            args (str):     Command line args to parse (Think "sys.argv[1:]")
+        """
+        super().__init__(args=args)
+
+    def parse(self):
+        """
+        Parse CLI args.
+        """
+        self.parser.add_argument('--socket',
+                                 type=str,
+                                 metavar='SOCKET-PATH',
+                                 help='Where to listen, instead of ".stasipy/daemon.sock" in the site.')
+
+        self.parsed_args = self.parser.parse_args(self.args)
+
+    def run(self):
+        """
+        Execute.
+        """
+        daemon = BuildDaemon(
+            site_path=self.parsed_args.site_path,
+            socket_path=self.parsed_args.socket,
+            verbose_mode=self.parsed_args.verbose,
+        )
+
+        # Clean up the socket on "kill" too, not just on Ctrl-C.
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            daemon.serve()
+        except KeyboardInterrupt:
+            pass
+
+        return 0
@@ -5,12 +5,50 @@ generate.py:
 Author: Corwin Brown
 Date: 05/01/2016
 """
-from __future__ import absolute_import
+import argparse
+from datetime import datetime
 
 from stasipy.stasipy import Stasipy
 from stasipy.cli import StasipyCLI
 
 
+def _parse_since(value):
+    """
+    Parse the "--since" argument into a timestamp.
+
+    Args:
+        value (str):    An ISO 8601 date or datetime, e.g. "2026-10-19" or
+                            "2026-10-19T09:30".
+
+    Returns:
+        float
+    """
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError('Not an ISO 8601 date: {0}'.format(value))
+
+
+def _parse_shard(value):
+    """
+    Parse the "--shard" argument.
+
+    Args:
+        value (str):    "<index>/<count>", e.g. "2/4". Index starts at 1.
+
+    Returns:
+        tuple:          (index, count)
+    """
+    try:
+        index, count = [int(part) for part in value.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('Expected a shard like "2/4", got: {0}'.format(value))
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError('Shard index must be between 1 and {0}: {1}'.format(count, value))
+
+    return index, count
+
+
 class StasipyGenerate(StasipyCLI):
     """
     CLI command to generate a site.
@@ -25,13 +63,44 @@ class StasipyGenerate(StasipyCLI):
         Args:
             args (str):     Command line args to parse (Think "sys.argv[1:]")
         """
-        super(self.__class__, self).__init__(args=args)
+        super().__init__(args=args)
 
     def parse(self):
         """
         Parse CLI args.
         """
+        self.parser.add_argument('--manifest',
+                                 type=str,
+                                 metavar='MANIFEST-PATH',
+                                 help='Where to write the manifest of changed output files.')
+        self.parser.add_argument('--metrics-file',
+                                 type=str,
+                                 metavar='METRICS-PATH',
+                                 help='Write build metrics here, in Prometheus\' text format (e.g. for '
+                                      'node_exporter\'s textfile collector).')
+        self.parser.add_argument('--output',
+                                 type=str,
+                                 metavar='OUTPUT-PATH',
+                                 help='Where to write the site, instead of "out". Paths ending in '
+                                      '.tar, .tar.gz, .tgz or .zip are written as an archive.')
+        self.parser.add_argument('--only',
+                                 action='append',
+                                 metavar='PATH-OR-GLOB',
+                                 help='Only build documents and static files matching this path '
+                                      'or glob. May be given more than once.')
+        self.parser.add_argument('--since',
+                                 type=_parse_since,
+                                 metavar='DATE',
+                                 help='Only build source files modified at or after this date.')
+        self.parser.add_argument('--shard',
+                                 type=_parse_shard,
+                                 metavar='INDEX/COUNT',
+                                 help='Only build one shard of the posts and pages, to be combined '
+                                      'with "stasipy merge".')
+
         self.parsed_args = self.parser.parse_args(self.args)
+        if self.parsed_args.shard and (self.parsed_args.only or self.parsed_args.since is not None):
+            self.parser.error('--shard can not be combined with --only or --since.')
 
     def run(self):
         """
@@ -41,5 +110,12 @@ class StasipyGenerate(StasipyCLI):
             base_site_path=self.parsed_args.site_path,
             verbose_mode=self.parsed_args.verbose,
             skip_confirm=self.parsed_args.skip_confirm,
+            manifest_path=self.parsed_args.manifest,
+            output_path=self.parsed_args.output,
+            metrics_path=self.parsed_args.metrics_file,
+        )
+        return stasipy.generate(
+            only=self.parsed_args.only,
+            since=self.parsed_args.since,
+            shard=self.parsed_args.shard,
         )
-        stasipy.generate()
@@ -5,8 +5,6 @@ init.py:
 Author: Corwin Brown
 Date: 05/01/2016
 """
-from __future__ import absolute_import
-
 from stasipy.stasipy import Stasipy
 from stasipy.cli import StasipyCLI
 
@@ -25,7 +23,7 @@ class StasipyInit(StasipyCLI):
         Args:
             args (str):     Command line args to parse (Think "sys.argv[1:]")
         """
-        super(self.__class__, self).__init__(args=args)
+        super().__init__(args=args)
 
     def parse(self):
         """
@@ -44,19 +42,19 @@ class StasipyInit(StasipyCLI):
                                  metavar='MAINTAINER_EMAIL',
                                  help='The email of the person maintaining the site.')
 
-        super(self.__class__, self).parse()
+        super().parse()
 
     def run(self):
         """
         Execute.
         """
         if self.parsed_args.maintainer is None:
-            maintainer = raw_input('What is the name of the site maintainer: ')
+            maintainer = input('What is the name of the site maintainer: ')
         else:
             maintainer = self.parsed_args.maintainer
 
         if self.parsed_args.maintainer_email is None:
-            maintainer_email = raw_input('What is the e-mail address of the site maintainer: ')
+            maintainer_email = input('What is the e-mail address of the site maintainer: ')
         else:
             maintainer_email = self.parsed_args.maintainer_email
 
@@ -5,8 +5,6 @@ main.py:
 Author: Corwin Brown
 Date: 05/01/2016
 """
-from __future__ import absolute_import
-
 import sys
 
 from stasipy.errors import StasipyException
@@ -15,6 +13,10 @@ from stasipy.errors import StasipyException
 VALID_SUBCOMMANDS = [
     'init',
     'generate',
+    'batch',
+    'merge',
+    'daemon',
+    'client',
 ]
 
 
@@ -71,6 +73,14 @@ def main():
         from stasipy.cli.init import StasipyInit as myCLI
     elif subcommand == 'generate':
         from stasipy.cli.generate import StasipyGenerate as myCLI
+    elif subcommand == 'batch':
+        from stasipy.cli.batch import StasipyBatch as myCLI
+    elif subcommand == 'merge':
+        from stasipy.cli.merge import StasipyMerge as myCLI
+    elif subcommand == 'daemon':
+        from stasipy.cli.daemon import StasipyDaemon as myCLI
+    elif subcommand == 'client':
+        from stasipy.cli.client import StasipyClient as myCLI
 
     cli = myCLI(args)
     try:
@@ -81,7 +91,7 @@ def main():
         return 1
 
     try:
-        cli.run()
+        return cli.run()
     except StasipyException as e:
         # TODO: Catch the actual exception, not just everything.
         print('Exception: {0}'.format(e))
@@ -0,0 +1,68 @@
+"""
+merge.py:
+    Class for the 'merge' subcommand.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+from stasipy.stasipy import Stasipy
+from stasipy.cli import StasipyCLI
+
+
+class StasipyMerge(StasipyCLI):
+    """
+    CLI command to assemble a site from the shards of a sharded build.
+    """
+
+    _description = 'Merge the shards of a sharded build into a site.'
+
+    def __init__(self, args):
+        """
+        Constructor
+
+        Args:
+            args (str):     Command line args to parse (Think "sys.argv[1:]")
+        """
+        super().__init__(args=args)
+
+    def parse(self):
+        """
+        Parse CLI args.
+        """
+        self.parser.add_argument('--shards',
+                                 type=int,
+                                 required=True,
+                                 metavar='COUNT',
+                                 help='How many shards the build was split into.')
+        self.parser.add_argument('--manifest',
+                                 type=str,
+                                 metavar='MANIFEST-PATH',
+                                 help='Where to write the manifest of changed output files.')
+        self.parser.add_argument('--metrics-file',
+                                 type=str,
+                                 metavar='METRICS-PATH',
+                                 help='Write build metrics here, in Prometheus\' text format (e.g. for '
+                                      'node_exporter\'s textfile collector).')
+        self.parser.add_argument('--output',
+                                 type=str,
+                                 metavar='OUTPUT-PATH',
+                                 help='Where to write the site, instead of "out". Paths ending in '
+                                      '.tar, .tar.gz, .tgz or .zip are written as an archive.')
+
+        self.parsed_args = self.parser.parse_args(self.args)
+        if self.parsed_args.shards < 1:
+            self.parser.error('--shards must be at least 1.')
+
+    def run(self):
+        """
+        Execute.
+        """
+        stasipy = Stasipy(
+            base_site_path=self.parsed_args.site_path,
+            verbose_mode=self.parsed_args.verbose,
+            skip_confirm=self.parsed_args.skip_confirm,
+            manifest_path=self.parsed_args.manifest,
+            output_path=self.parsed_args.output,
+            metrics_path=self.parsed_args.metrics_file,
+        )
+        return stasipy.merge(self.parsed_args.shards)
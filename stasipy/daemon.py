@@ -0,0 +1,239 @@
+"""
+daemon.py:
+    A long running build server for a site, and the client that talks to it.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import io
+import os
+import json
+import time
+import socket
+import contextlib
+from datetime import datetime
+
+from stasipy.errors import StasipyException
+
+
+def default_socket_path(site_path):
+    """
+    Where a site's daemon listens, unless told otherwise.
+
+    Args:
+        site_path (str):    The path to the site.
+
+    Returns:
+        str
+    """
+    return os.path.join(os.path.expanduser(site_path), '.stasipy', 'daemon.sock')
+
+
+def send_request(socket_path, request):
+    """
+    Send a request to a daemon, and wait for its response.
+
+    Requests and responses are each a single line of JSON.
+
+    Args:
+        socket_path (str):  The daemon's socket.
+        request (dict):     The request. "command" says what to do.
+
+    Returns:
+        dict
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise StasipyException('No daemon is listening at "{0}". Start one with "stasipy daemon".'
+                                   .format(socket_path))
+
+        with client.makefile('rwb') as f:
+            f.write(json.dumps(request).encode('utf-8') + b'\n')
+            f.flush()
+            line = f.readline()
+    finally:
+        client.close()
+
+    if not line:
+        raise StasipyException('The daemon hung up without responding.')
+
+    return json.loads(line.decode('utf-8'))
+
+
+class BuildDaemon(object):
+    """
+    Builds a site on request, over a Unix socket, from a process that stays
+        up between builds.
+
+    Imports, the template environment and compiled templates, the parsed
+        site config and every parsed document (see "SiteModel") stay warm, so
+        a build only reads what changed since the last one. Requests are
+        handled one at a time, and each build still takes the site's build
+        lock, so the daemon and "stasipy generate" never step on each other.
+    """
+
+    def __init__(self, site_path, socket_path=None, verbose_mode=False):
+        """
+        Constructor
+
+        Args:
+            site_path (str):        The path to the site to build.
+            socket_path (str):      Where to listen. Defaults to
+                                        ".stasipy/daemon.sock" in the site.
+            verbose_mode (bool):    Toggle verbose mode for the daemon's own
+                                        messages.
+        """
+        from stasipy.model import SiteModel
+
+        self.site_path = os.path.abspath(os.path.expanduser(site_path))
+        self.socket_path = socket_path or default_socket_path(self.site_path)
+        self.verbose_mode = verbose_mode
+        self.model = SiteModel()
+        self.builds = 0
+        self.started = time.time()
+        self._server = None
+        self._stopping = False
+
+    def serve(self):
+        """
+        Handle requests until asked to stop.
+        """
+        self._bind()
+        print('Listening on {0} (pid {1}).'.format(self.socket_path, os.getpid()))
+        try:
+            while not self._stopping:
+                conn, _ = self._server.accept()
+                with conn:
+                    self._handle(conn)
+        finally:
+            self._server.close()
+            with contextlib.suppress(OSError):
+                os.unlink(self.socket_path)
+
+    def _bind(self):
+        """
+        Start listening, cleaning up after a daemon that didn't exit
+            cleanly, but never taking over from one that's still running.
+        """
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)
+            else:
+                raise StasipyException('A daemon is already listening at "{0}".'.format(self.socket_path))
+            finally:
+                probe.close()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._server.listen()
+
+    def _handle(self, conn):
+        """
+        Read a request off a connection, and write back the response.
+        """
+        with conn.makefile('rwb') as f:
+            line = f.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line.decode('utf-8'))
+                command = request.get('command')
+                if command == 'generate':
+                    response = self._generate(request)
+                elif command == 'status':
+                    response = self._status()
+                elif command == 'stop':
+                    self._stopping = True
+                    response = {'status': 0, 'output': 'Daemon stopping.\n'}
+                else:
+                    response = {'status': 1, 'output': 'Unknown command: {0}\n'.format(command)}
+            except ValueError as e:
+                response = {'status': 1, 'output': 'Bad request: {0}\n'.format(e)}
+
+            try:
+                f.write(json.dumps(response).encode('utf-8') + b'\n')
+                f.flush()
+            except OSError:
+                # The client gave up waiting. Nothing to do but move on.
+                pass
+
+    def _generate(self, request):
+        """
+        Build the site.
+
+        Args:
+            request (dict):     May have "only", "since" (an ISO 8601 date),
+                                    "output", "manifest", and "verbose".
+
+        Returns:
+            dict:   "status", everything the build printed as "output", and
+                        "timings" of each phase in milliseconds.
+        """
+        from stasipy.stasipy import Stasipy
+
+        start = time.perf_counter()
+        output = io.StringIO()
+        summary = None
+        documents = None
+        timings = {}
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                since = request.get('since')
+                if since is not None:
+                    try:
+                        since = datetime.fromisoformat(since).timestamp()
+                    except ValueError:
+                        raise StasipyException('Not an ISO 8601 date: {0}'.format(since))
+
+                stasipy = Stasipy(
+                    base_site_path=self.site_path,
+                    verbose_mode=request.get('verbose'),
+                    skip_confirm=True,
+                    manifest_path=request.get('manifest'),
+                    output_path=request.get('output'),
+                    site_model=self.model,
+                )
+                status = stasipy.generate(only=request.get('only'), since=since) or 0
+                timings = dict((phase, round(seconds * 1000, 1))
+                               for phase, seconds in stasipy.metrics.durations.items())
+                documents = {'reused': self.model.reused, 'read': self.model.loaded}
+                if stasipy.sink is not None:
+                    summary = stasipy.sink.manifest.summary()
+            except Exception as e:
+                # A broken build shouldn't take the daemon down with it.
+                print('Exception: {0}'.format(e))
+                status = 1
+
+        self.builds += 1
+        total_ms = (time.perf_counter() - start) * 1000
+        if self.verbose_mode:
+            print('Build {0} finished with status {1} in {2:.1f}ms.'.format(self.builds, status, total_ms))
+
+        return {
+            'status': status,
+            'output': output.getvalue(),
+            'summary': summary,
+            'documents': documents,
+            'timings': dict(timings, total=round(total_ms, 1)),
+        }
+
+    def _status(self):
+        """
+        Report on the daemon.
+
+        Returns:
+            dict
+        """
+        return {
+            'status': 0,
+            'output': 'Daemon for {0} (pid {1}): up {2:.0f}s, {3} builds.\n'.format(
+                self.site_path, os.getpid(), time.time() - self.started, self.builds),
+        }
@@ -5,11 +5,22 @@ defaults.py:
 Author: Corwin Brown
 Date: 05/07/2016
 """
-from __future__ import absolute_import
 
 
 class StasipyDefaults:
     summary_length = 40
+    output_workers = 8
+    image_widths = [480, 960, 1440]
+    image_quality = 80
+    bundle_minify = False
+    markdown_cache_size_mb = 64
+    related_posts_count = 5
+    related_posts_tag_weight = 3
+    lock_timeout = None
+    json_api_path = 'api'
+    json_api_page_size = 20
+    json_api_taxonomies = ['tags']
+    markdown_cache_env = 'STASIPY_MARKDOWN_CACHE'
     default_site_config = {
         'maintainer': 'Your Name',
         'maintainer_email': 'your_email@email.com',
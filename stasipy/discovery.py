@@ -0,0 +1,143 @@
+"""
+discovery.py:
+    Find documents on disk as cheaply as possible.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import fnmatch
+import posixpath
+from collections import namedtuple
+
+import stasipy.utils as utils
+
+# A file found during discovery.
+#
+#   path:       Full path to the file.
+#   relpath:    Path relative to the root that was scanned, always using
+#                   forward slashes.
+#   stat:       The stat result for the file, so nobody has to stat it again.
+DiscoveredFile = namedtuple('DiscoveredFile', ['path', 'relpath', 'stat'])
+
+
+class IgnoreRules(object):
+    """
+    A set of ".stasipyignore" style glob patterns.
+
+    Patterns containing a slash are matched against the whole relative path,
+        anything else is matched against just the file or directory name.
+        Blank lines and lines starting with "#" are skipped.
+    """
+
+    filename = '.stasipyignore'
+
+    def __init__(self, patterns=None):
+        """
+        Constructor
+
+        Args:
+            patterns (list):    Glob patterns to ignore.
+        """
+        self.path_patterns = []
+        self.name_patterns = []
+        for pattern in patterns or []:
+            pattern = pattern.strip().rstrip('/')
+            if not pattern or pattern.startswith('#'):
+                continue
+            if '/' in pattern:
+                self.path_patterns.append(pattern.lstrip('/'))
+            else:
+                self.name_patterns.append(pattern)
+
+    @classmethod
+    def from_file(cls, fpath):
+        """
+        Read ignore rules from a file. A missing file means nothing
+            is ignored.
+
+        Args:
+            fpath (str):    The path of the ignore file.
+
+        Returns:
+            IgnoreRules
+        """
+        if not utils.file_exists(fpath):
+            return cls()
+
+        with open(fpath, 'r', encoding='utf-8') as f:
+            return cls(f.read().splitlines())
+
+    def matches(self, relpath):
+        """
+        Check if a path should be ignored.
+
+        Args:
+            relpath (str):  Path relative to the scanned root, using forward
+                                slashes.
+
+        Returns:
+            bool
+        """
+        name = posixpath.basename(relpath)
+        for pattern in self.name_patterns:
+            if fnmatch.fnmatch(name, pattern):
+                return True
+        for pattern in self.path_patterns:
+            if fnmatch.fnmatch(relpath, pattern):
+                return True
+
+        return False
+
+
+def scan_files(root, path='', extensions=None, ignore_rules=None):
+    """
+    Generator that walks a directory tree with os.scandir, yielding the files
+        that might be documents.
+
+    Extensions are checked before anything else, since it's just string
+        work. The stat result is taken from the directory entry, which on
+        most platforms means it was handed to us for free while listing
+        the directory.
+
+    Args:
+        root (str):                 The directory relative paths (and ignore
+                                        rules) are based on.
+        path (str):                 The directory, relative to root, to
+                                        start searching in.
+        extensions (iterable):      File extensions (with the dot) to keep.
+                                        If None, everything is kept.
+        ignore_rules (IgnoreRules): Paths to skip.
+
+    Returns:
+        DiscoveredFile
+    """
+    pending = [path.replace(os.sep, '/')]
+    while pending:
+        reldir = pending.pop()
+        try:
+            entries = sorted(os.scandir(os.path.join(root, reldir)), key=lambda e: e.name)
+        except OSError:
+            # Directories that don't exist (or that we can't read) just
+            #   don't contain any documents.
+            continue
+
+        # Push directories in reverse, so they're walked in sorted order.
+        subdirs = []
+        for entry in entries:
+            relpath = posixpath.join(reldir, entry.name)
+            if entry.is_dir():
+                if ignore_rules is None or not ignore_rules.matches(relpath):
+                    subdirs.append(relpath)
+                continue
+
+            if extensions is not None and os.path.splitext(entry.name)[1] not in extensions:
+                continue
+            if ignore_rules is not None and ignore_rules.matches(relpath):
+                continue
+            if not entry.is_file():
+                continue
+
+            yield DiscoveredFile(entry.path, relpath, entry.stat())
+
+        pending.extend(reversed(subdirs))
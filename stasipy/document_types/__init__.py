@@ -5,10 +5,11 @@ document_types:
 Author: Corwin Brown
 Date: 05/24/2016
 """
-from __future__ import absolute_import
-
 import os
+import copy
+import posixpath
 from datetime import datetime
+from collections import ChainMap
 from abc import ABCMeta, abstractmethod
 
 import stasipy.utils as utils
@@ -25,14 +26,12 @@ class PageType(object):
     meta = 'meta'
 
 
-class Document(object):
+class Document(metaclass=ABCMeta):
     """
     Base Document type class
     """
 
-    __metaclass__ = ABCMeta
-
-    def __init__(self, path, type, name=None, site_config=None):
+    def __init__(self, path, type, name=None, site_config=None, relative_dir='', stat=None, time_format=None):
         """
         Constructor
 
@@ -42,12 +41,21 @@ class Document(object):
                                         example 'Posts', or 'Pages'.
             name (str):             The name of the document. Defaults
                                         to basename
-            time_format (str):      Format string for the time.
-            summary_length (str):    Word limit for sample content.
-        """
-        self.path = self._validate_path(path)
+            relative_dir (str):     The directory the document lives in,
+                                        relative to its document type's
+                                        directory. Output keeps this
+                                        structure.
+            stat (stat_result):     A stat result from discovery. If given,
+                                        we trust the document exists and
+                                        don't stat it again.
+            time_format (str):      The format the document's date is in.
+                                        Defaults to the site's. Translations
+                                        are dated in their locale's format.
+        """
+        self.path = self._validate_path(path) if stat is None else path
+        self.stat = stat
         self.site_config = site_config or {}
-        self.time_format = self.site_config.get('time_format', '%m/%d/%Y')
+        self.time_format = time_format or self.site_config.get('time_format', '%m/%d/%Y')
         try:
             self.type = getattr(PageType, type.lower())
         except AttributeError:
@@ -60,6 +68,7 @@ class Document(object):
         self.title = self.metadata.pop('title', self.name)
         self.author = self.metadata.pop('author', site_config.get('maintainer', None))
         self.author_email = self.metadata.pop('author_email', site_config.get('maintainer_email', None))
+        self.relative_path = posixpath.join(relative_dir.replace(os.sep, '/'), self.name)
         self.template_name = self.metadata.pop('template', '{0}.html.j2'.format(self.type))
         self.navbar = utils.str_to_bool(self.metadata.pop('navbar', 'True'))
         self.href = self.metadata.pop('href', self._generate_href())
@@ -67,10 +76,48 @@ class Document(object):
         self.date_str = self._create_date_string()
         self.summary_length = self.site_config.get('summary_length', defaults.summary_length)
 
+        # Filled in by "prepare".
+        self.summary = None
+        self.content = None
+
+        # Filled in with other posts' documents, if the site asks for
+        #   related posts.
+        self.related = []
+
+        # The locale this document is written in, on sites with locales.
+        self.locale = None
+
+    def localize(self, locale):
+        """
+        Get a copy of this document to render for a locale. The copy shares
+            everything already parsed out of the source, but renders with
+            the locale's config, and links under the locale's prefix.
+
+        Args:
+            locale (Locale):    The locale to render for.
+
+        Returns:
+            Document
+        """
+        doc = copy.copy(self)
+        doc.locale = locale.code
+        doc.site_config = locale.site_vars
+        doc.href = locale.href(self.href)
+        doc.time_format = locale.site_vars.get('time_format', self.time_format)
+        doc.date_str = doc._create_date_string()
+        doc.related = []
+        return doc
+
+    def prepare(self):
+        """
+        Render out the summary and base content.
+
+        This is kept out of the constructor, so everything we know about every
+            document (like where it lives) is available to templates by the
+            time any of them are rendered.
+        """
         if self.type == PageType.post:
             self.summary = self._generate_summary()
-        else:
-            self.summary = None
 
         self.content = self._render_base()
 
@@ -91,7 +138,7 @@ class Document(object):
             return datetime.strptime(raw_date, self.time_format)
         else:
             # Get file create date (Probably not what the user wants, but its something.)
-            create_time = os.stat(self.path).st_ctime
+            create_time = (self.stat or os.stat(self.path)).st_ctime
             return datetime.fromtimestamp(create_time)
 
     def _create_date_string(self):
@@ -109,9 +156,9 @@ class Document(object):
         """
 
         if self.type == 'meta':
-            return '/{0}.html'.format(self.name)
+            return '/{0}.html'.format(self.relative_path)
         else:
-            return '/{0}/{1}.html'.format(self.type, self.name)
+            return '/{0}/{1}.html'.format(self.type, self.relative_path)
 
     def _validate_path(self, path):
         """
@@ -127,26 +174,29 @@ class Document(object):
             raise ValueError('Nothing readable exists at "{0}"!'.format(path))
         return path
 
-    def _build_template_vars(self, **kwargs):
+    def _build_template_vars(self, context=None):
         """
-        Construct a dict to get passed down to our template containing
-            various variables (That'd be a good band name).
+        Construct the variables to get passed down to our template (That'd
+            be a good band name).
+
+        Nothing is copied. The site config, this document's metadata, and
+            whatever the caller hands us are stacked up as read-only layers,
+            so setting this up costs the same no matter how big any of them
+            are. Earlier layers win.
 
         Args:
-            kwargs (dict):  Whatever you'd like passed into the dict.
+            context (mapping):  Whatever you'd like layered on top, for
+                                    example section wide variables.
 
         Returns:
-            dict
+            ChainMap
         """
-        template_vars = {
+        document_vars = {
             'document': self.__dict__,
             'active_page': 'blog' if self.type == 'post' else self.title,
         }
-        template_vars.update(self.metadata)
-        template_vars.update(self.site_config)
-        template_vars.update(kwargs)
 
-        return template_vars
+        return ChainMap(context or {}, self.site_config, self.metadata, document_vars)
 
     def _generate_summary(self, summary_length=50):
         """
@@ -154,12 +204,12 @@ class Document(object):
 
         Not an ideal solution as it will eat new lines.
         """
-        with open(self.path, 'r') as f:
+        with open(self.path, 'r', encoding='utf-8') as f:
             content = utils.remove_markdown_metadata(f.read())
 
         template_vars = self._build_template_vars()
         summary_content = '{0}...'.format(' '.join(content.split()[:summary_length]))
-        summary_content = utils.render_template_from_string(summary_content, **template_vars)
+        summary_content = utils.render_template_from_string(summary_content, template_vars)
         _, summary_content = utils.parse_markdown(summary_content)
 
         return summary_content
@@ -172,12 +222,12 @@ class Document(object):
             str
         """
         template_vars = self._build_template_vars()
-        _, raw_content = utils.parse_markdown_template(self.path, **template_vars)
+        _, raw_content = utils.parse_markdown_template(self.path, template_vars)
 
         return raw_content
 
     @abstractmethod
-    def render(self, templates_path, **kwargs):
+    def render(self, templates_path, context=None):
         """
         Render out a document
         """
@@ -5,8 +5,6 @@ html.py:
 Author: Corwin Brown
 Date: 05/28/2016
 """
-from __future__ import absolute_import
-
 import stasipy.utils as utils
 from stasipy.document_types import Document
 
@@ -20,7 +18,7 @@ class HTMLDocument(Document):
         without having to write my own parser.
     """
 
-    def __init__(self, path, type, name=None, site_config=None):
+    def __init__(self, path, type, name=None, site_config=None, relative_dir='', stat=None, time_format=None):
         """
         Constructor
 
@@ -31,32 +29,41 @@ class HTMLDocument(Document):
             name (str):             The name of the document. Defaults to basename
             site_config (dict):     The base site config (used to render base
                                         page content.)
+            relative_dir (str):     The directory the document lives in,
+                                        relative to its document type's
+                                        directory.
+            stat (stat_result):     A stat result from discovery.
+            time_format (str):      The format the document's date is in.
+                                        Defaults to the site's.
 
         """
-        super(self.__class__, self).__init__(path=path,
-                                             type=type,
-                                             name=name,
-                                             site_config=site_config)
+        super().__init__(path=path,
+                         type=type,
+                         name=name,
+                         site_config=site_config,
+                         relative_dir=relative_dir,
+                         stat=stat,
+                         time_format=time_format)
 
-    def render(self, templates_path, **kwargs):
+    def render(self, templates_path, context=None):
         """
         Render an HTML file.
 
         Args:
             templates_path (str):       Path to search for templates.
-            kwargs (dict):              Any additonal data to push down
+            context (mapping):          Any additonal data to push down
                                             to the template.
         """
-        # Read the file to get it's raw contents.
-        with open(self.path, 'r') as f:
-            self.content = f.read()
+        # Read the file to get it's raw contents, minus the metadata.
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.content = utils.remove_markdown_metadata(f.read())
 
         # Munch the site_vars a bit to accomodate doc_types.
-        template_vars = self.template_vars(**kwargs)
+        template_vars = self._build_template_vars(context)
 
         # Render the page.
         return utils.render_template_from_file(
             templates_path=templates_path,
             template_name=self.template_name,
-            **template_vars
+            context=template_vars,
         )
@@ -5,8 +5,6 @@ markdown.py:
 Author: Corwin Brown
 Date: 05/28/2016
 """
-from __future__ import absolute_import
-
 import stasipy.utils as utils
 from stasipy.document_types import Document
 
@@ -16,7 +14,7 @@ class MarkdownDocument(Document):
     Implementation of the Document class for Markdown Documents.
     """
 
-    def __init__(self, path, type, name=None, site_config=None):
+    def __init__(self, path, type, name=None, site_config=None, relative_dir='', stat=None, time_format=None):
         """
         Constructor
 
@@ -27,28 +25,37 @@ class MarkdownDocument(Document):
             name (str):             The name of the document. Defaults to basename
             site_config (dict):     The base site config (used to render base
                                         page content.)
+            relative_dir (str):     The directory the document lives in,
+                                        relative to its document type's
+                                        directory.
+            stat (stat_result):     A stat result from discovery.
+            time_format (str):      The format the document's date is in.
+                                        Defaults to the site's.
 
         """
-        super(self.__class__, self).__init__(path=path,
-                                             type=type,
-                                             name=name,
-                                             site_config=site_config)
-
-    def render(self, templates_path, **kwargs):
+        super().__init__(path=path,
+                         type=type,
+                         name=name,
+                         site_config=site_config,
+                         relative_dir=relative_dir,
+                         stat=stat,
+                         time_format=time_format)
+
+    def render(self, templates_path, context=None):
         """
         Render a markdown file.
 
         Args:
             templates_path (str):   Path to search for templates.
-            kwargs (dict):          Any additional data to push down to
+            context (mapping):      Any additional data to push down to
                                         the template.
         """
         # Construct our variables.
-        template_vars = self._build_template_vars(**kwargs)
+        template_vars = self._build_template_vars(context)
 
         # Render the page.
         return utils.render_template_from_file(
             templates_path=templates_path,
             template_name=self.template_name,
-            **template_vars
+            context=template_vars,
         )
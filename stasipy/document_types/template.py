@@ -5,8 +5,6 @@ template.py:
 Author: Corwin Brown
 Date: 05/28/2016
 """
-from __future__ import absolute_import
-
 import stasipy.utils as utils
 from stasipy.document_types import Document
 
@@ -22,7 +20,7 @@ class TemplateDocument(Document):
         markdown page without having to write the parser myself.
     """
 
-    def __init__(self, path, type, name=None, site_config=None):
+    def __init__(self, path, type, name=None, site_config=None, relative_dir='', stat=None, time_format=None):
         """
         Constructor
 
@@ -33,33 +31,40 @@ class TemplateDocument(Document):
             name (str):             The name of the document. Defaults to basename
             site_config (dict):     The base site config (used to render base
                                         page content.)
+            relative_dir (str):     The directory the document lives in,
+                                        relative to its document type's
+                                        directory.
+            stat (stat_result):     A stat result from discovery.
+            time_format (str):      The format the document's date is in.
+                                        Defaults to the site's.
 
         """
-        super(self.__class__, self).__init__(path=path,
-                                             type=type,
-                                             name=name,
-                                             site_config=site_config)
+        super().__init__(path=path,
+                         type=type,
+                         name=name,
+                         site_config=site_config,
+                         relative_dir=relative_dir,
+                         stat=stat,
+                         time_format=time_format)
 
-    def render(self, templates_path, **kwargs):
+    def render(self, templates_path, context=None):
         """
         Render a jinja template file.
 
         Args:
             templates_path (str):       Path to search for templates.
-            kwargs (dict):              Any additonal data to push down
+            context (mapping):          Any additonal data to push down
                                             to the template.
         """
-        template_vars = self._build_template_vars(**kwargs)
+        template_vars = self._build_template_vars(context)
 
         # Blow out the template.
-        _, self.content = utils.parse_markdown_template(self.path, **template_vars)
-
-        # Rebuild our template vars with the new content.
-        template_vars = self._build_template_vars(**kwargs)
+        _, self.content = utils.parse_markdown_template(self.path, template_vars)
 
-        # Render the page.
+        # Render the page. No need to rebuild our template vars, "document" is
+        #   a live view of this object, so it already has the new content.
         return utils.render_template_from_file(
             templates_path=templates_path,
             template_name=self.template_name,
-            **template_vars
+            context=template_vars,
         )
@@ -5,7 +5,6 @@ errors.py:
 Author: Corwin Brown
 Date: 05/07/2016
 """
-from __future__ import absolute_import
 
 
 class StasipyException(Exception):
@@ -0,0 +1,66 @@
+"""
+extensions.py:
+    Jinja extensions available to every Stasipy template.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds a "cache" tag, for regions of a template that come out the same on
+        most pages (navbars, headers, footers, etc). The region is rendered
+        the first time a key is seen during a build, and spliced straight
+        into every page after that:
+
+        {% cache 'navbar', active_page %}
+            ...
+        {% endcache %}
+
+    Everything after "cache" makes up the key, so anything the region varies
+        on has to be part of it. Keys are scoped to the template and line the
+        tag is on, so the same key in two places never collides. The cache
+        itself lives in the "_fragment_cache" template variable, which
+        Stasipy sets fresh for every build. Without it, the region is just
+        rendered as normal.
+    """
+
+    tags = set(['cache'])
+    context_variable = '_fragment_cache'
+
+    def parse(self, parser):
+        """
+        Parse a cache tag, and its body.
+        """
+        lineno = next(parser.stream).lineno
+
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render_cached', [
+            nodes.ContextReference(),
+            nodes.Const(parser.name),
+            nodes.Const(lineno),
+            nodes.List(key),
+        ])
+
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, context, template_name, lineno, key, caller):
+        """
+        Render a cached region, or pull it out of the cache.
+        """
+        cache = context.get(self.context_variable)
+        if cache is None:
+            return caller()
+
+        key = (template_name, lineno) + tuple(key)
+        if key not in cache:
+            cache[key] = caller()
+
+        return cache[key]
@@ -0,0 +1,270 @@
+"""
+images.py:
+    Generates resized variants of images in "static", for responsive
+        "srcset" markup.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import glob
+import json
+import hashlib
+import posixpath
+import multiprocessing
+
+from markupsafe import escape
+
+import stasipy.utils as utils
+from stasipy.errors import StasipyException
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# The EXIF tag saying which way up a photo is, and the values of it that
+#   turn the image on its side.
+_EXIF_ORIENTATION = 0x0112
+_EXIF_SIDEWAYS = (5, 6, 7, 8)
+
+
+class ResponsiveImage(object):
+    """
+    An image in "static", along with the resized variants of it. This is
+        what the "image" template function hands back.
+    """
+
+    def __init__(self, src, width, height, variants):
+        """
+        Constructor
+
+        Args:
+            src (str):          The href of the original image.
+            width (int):        Width of the original image.
+            height (int):       Height of the original image.
+            variants (list):    (href, width) tuples for each resized
+                                    variant, smallest first.
+        """
+        self.src = src
+        self.width = width
+        self.height = height
+        self.variants = variants
+
+    @property
+    def srcset(self):
+        """
+        The value for an "srcset" attribute, including the original.
+        """
+        candidates = self.variants + [(self.src, self.width)]
+        return ', '.join('{0} {1}w'.format(href, width) for href, width in candidates)
+
+    def tag(self, alt='', sizes='100vw', **attrs):
+        """
+        Render out an <img> tag.
+
+        Args:
+            alt (str):      The alt text.
+            sizes (str):    The value for the "sizes" attribute.
+            attrs (dict):   Any other attributes to add to the tag.
+
+        Returns:
+            str
+        """
+        tag_attrs = [
+            ('src', self.src),
+            ('srcset', self.srcset),
+            ('sizes', sizes),
+            ('width', self.width),
+            ('height', self.height),
+            ('alt', alt),
+        ] + sorted(attrs.items())
+        return '<img {0}>'.format(' '.join('{0}="{1}"'.format(k, escape(v)) for k, v in tag_attrs))
+
+    def __str__(self):
+        return self.tag()
+
+
+class ImagePipeline(object):
+    """
+    Generates resized, re-encoded variants of images at a set of widths.
+
+    Variants are cached on disk, keyed by a hash of the source image and the
+        settings used to make them, so an image is only ever re-encoded when
+        it (or the settings) change. Sources are only re-hashed when their
+        size or mtime change. Cache misses are encoded in a process pool.
+
+    Images are turned the way their EXIF orientation says, so variants come
+        out the way up the source is displayed.
+    """
+
+    # Bumped whenever what's cached changes meaning, to throw old caches away.
+    cache_version = 2
+
+    def __init__(self, cache_path, widths, quality, workers=None, pool=None):
+        """
+        Constructor
+
+        Args:
+            cache_path (str):   Where to keep encoded variants between builds.
+            widths (list):      The widths to generate. Nothing is ever
+                                    scaled up.
+            quality (int):      Encoder quality for lossy formats.
+            workers (int):      Processes to encode with. Defaults to the
+                                    number of CPUs.
+            pool (Pool):        A process pool shared with other builds, to
+                                    encode with instead of starting one.
+        """
+        if Image is None:
+            raise StasipyException('Responsive images require Pillow. Try "pip install Pillow".')
+
+        self.cache_path = cache_path
+        self.index_path = os.path.join(cache_path, 'index.json')
+        self.widths = sorted(set(int(w) for w in widths))
+        self.quality = int(quality)
+        self.workers = workers
+        self.pool = pool
+
+    def process(self, static_files):
+        """
+        Generate variants for every image in a list of static files.
+
+        Args:
+            static_files (list):    DiscoveredFile objects for everything in
+                                        "static".
+
+        Returns:
+            tuple:  (images, variant_files), where images maps each image's
+                        href to a ResponsiveImage, and variant_files maps
+                        each image's relpath to a list of (relpath,
+                        cached_path) tuples to copy into the output
+                        directory.
+        """
+        utils.ensure_directory_exists(self.cache_path)
+        previous_index = self._read_index()
+        index = {}
+        images = {}
+        variant_files = {}
+        to_encode = []
+
+        for static_file in static_files:
+            if os.path.splitext(static_file.relpath)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+
+            source = self._source_info(static_file, previous_index.get(static_file.relpath))
+            index[static_file.relpath] = source
+
+            stem, ext = posixpath.splitext(static_file.relpath)
+            variants = []
+            variant_files[static_file.relpath] = []
+            for width in self.widths:
+                if width >= source['width']:
+                    break
+                cached_path = self._cached_variant_path(source['hash'], width, ext)
+                if not os.path.isfile(cached_path):
+                    to_encode.append((static_file.path, cached_path, width, self.quality))
+                relpath = '{0}-{1}w{2}'.format(stem, width, ext)
+                variants.append(('/{0}'.format(relpath), width))
+                variant_files[static_file.relpath].append((relpath, cached_path))
+
+            href = '/{0}'.format(static_file.relpath)
+            images[href] = ResponsiveImage(href, source['width'], source['height'], variants)
+
+        if to_encode and self.pool is not None:
+            self.pool.map(_encode_variant, to_encode)
+        elif to_encode:
+            pool = multiprocessing.Pool(self.workers)
+            try:
+                pool.map(_encode_variant, to_encode)
+            finally:
+                pool.close()
+                pool.join()
+
+        self._write_index(index)
+        self._prune(cached_path for files in variant_files.values() for _, cached_path in files)
+        return images, variant_files
+
+    def _source_info(self, static_file, previous):
+        """
+        Get the hash and dimensions of a source image, reusing what we knew
+            last time if the file hasn't been touched.
+        """
+        stat = static_file.stat
+        if (previous is not None and previous.get('version') == self.cache_version and
+                previous['mtime'] == stat.st_mtime and previous['size'] == stat.st_size):
+            return previous
+
+        with Image.open(static_file.path) as image:
+            width, height = image.size
+            if image.getexif().get(_EXIF_ORIENTATION) in _EXIF_SIDEWAYS:
+                width, height = height, width
+        return {
+            'version': self.cache_version,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'hash': utils.hash_file(static_file.path),
+            'width': width,
+            'height': height,
+        }
+
+    def _prune(self, keep):
+        """
+        Remove variants of images that have changed or gone away, or were
+            made with different settings.
+        """
+        keep = set(keep)
+        for path in glob.glob(os.path.join(self.cache_path, '*')):
+            if path not in keep and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+                os.unlink(path)
+
+    def _cached_variant_path(self, source_hash, width, ext):
+        """
+        Where a variant lives in the cache.
+        """
+        key = hashlib.sha1('{0}:{1}:{2}:{3}'.format(
+            source_hash, width, self.quality, self.cache_version).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_path, '{0}{1}'.format(key, ext))
+
+    def _read_index(self):
+        """
+        Read what we knew about each source image last build.
+        """
+        if not utils.file_exists(self.index_path):
+            return {}
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                return {}
+
+    def _write_index(self, index):
+        """
+        Write out what we know about each source image.
+        """
+        utils.write_json_atomic(self.index_path, index)
+
+
+def _encode_variant(args):
+    """
+    Resize and re-encode a single image. Runs in a worker process, so it has
+        to live at the module level.
+
+    Args:
+        args (tuple):   (source_path, cached_path, width, quality)
+    """
+    source_path, cached_path, width, quality = args
+    with Image.open(source_path) as image:
+        # Turning the image gives us a new one, without the format.
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        height = round(image.size[1] * width / image.size[0])
+        resized = image.resize((width, height), Image.LANCZOS)
+
+        # Write to a temp file first, so an interrupted build never leaves a
+        #   half written variant in the cache.
+        tmp_path = '{0}.{1}.tmp'.format(cached_path, os.getpid())
+        resized.save(tmp_path, format=image_format, quality=quality, optimize=True)
+    os.replace(tmp_path, cached_path)
@@ -0,0 +1,225 @@
+"""
+includes.py:
+    Including one document in another, and keeping track of who includes
+        what.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import json
+import threading
+
+import stasipy.utils as utils
+from stasipy.errors import StasipyException
+
+
+class Transcluder(object):
+    """
+    Renders documents into other documents, for one locale:
+
+        {{ include_doc('page/bio') }}
+        {{ include_doc('page', 'disclaimer') }}
+
+    Documents are looked up the same way as "url_for". Each included
+        document is rendered once per build, and the result reused by every
+        document that includes it. What it renders to is its content, without
+        its template, so put the include on a line of its own in Markdown.
+
+    Every include is recorded in an IncludeGraph, so targeted builds can
+        rebuild whatever includes a document that changed.
+    """
+
+    def __init__(self, index, graph):
+        """
+        Constructor
+
+        Args:
+            index (HrefIndex):      Documents to look includes up in.
+            graph (IncludeGraph):   Where to record who includes what.
+        """
+        self.index = index
+        self.graph = graph
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+        # The documents being included on each thread right now, innermost
+        #   last, to catch documents that end up including themselves.
+        self._including = threading.local()
+
+    def template_function(self):
+        """
+        Get "include_doc", for templates. It needs to know which document
+            is doing the including, so it takes the template's context.
+
+        Returns:
+            callable
+        """
+        import jinja2
+
+        @jinja2.pass_context
+        def include_doc(context, type_or_path, name=None):
+            return self.include(context.get('document'), type_or_path, name)
+
+        return include_doc
+
+    def include(self, includer, type_or_path, name=None):
+        """
+        Render a document, for another document to include.
+
+        Args:
+            includer (dict):        The template variables of the document
+                                        doing the including, if known.
+            type_or_path (str):     See "HrefIndex.find".
+            name (str):             See "HrefIndex.find".
+
+        Returns:
+            str
+        """
+        doc = self.index.find(type_or_path, name, caller='include_doc')
+
+        stack = getattr(self._including, 'stack', None)
+        if stack is None:
+            stack = self._including.stack = []
+
+        # Who's including this, outermost first.
+        chain = list(stack)
+        if not chain and includer is not None and 'path' in includer:
+            chain = [includer['path']]
+        if doc.path in chain:
+            raise StasipyException('include_doc: Documents include each other: {0}'.format(
+                ' -> '.join(self.graph.relpath(path) for path in chain + [doc.path])))
+        if chain:
+            self.graph.record(self.graph.relpath(chain[-1]), self.graph.relpath(doc.path))
+
+        with self._lock:
+            html = self._rendered.get(doc.path)
+        if html is not None:
+            return html
+
+        depth = len(stack)
+        if not stack:
+            stack.extend(chain)
+        stack.append(doc.path)
+        try:
+            html = doc.content if doc.content is not None else doc._render_base()
+        finally:
+            del stack[depth:]
+
+        with self._lock:
+            self._rendered[doc.path] = html
+
+        return html
+
+
+class IncludeGraph(object):
+    """
+    Which documents include which, kept in ".stasipy/includes.json" between
+        builds. Documents are keyed by their path relative to "src".
+
+    Only documents rendered by a build have their includes replaced, so a
+        targeted build doesn't forget what the rest of the site includes.
+    """
+
+    def __init__(self, path, source_path):
+        """
+        Constructor
+
+        Args:
+            path (str):             Where the graph is kept.
+            source_path (str):      The site's "src" directory.
+        """
+        self.path = path
+        self.source_path = source_path
+        self.previous = self._read()
+        self._includes = {}
+        self._lock = threading.Lock()
+
+    def relpath(self, path):
+        """
+        The key a document is recorded under.
+
+        Args:
+            path (str):     Full path to the document.
+
+        Returns:
+            str
+        """
+        return os.path.relpath(path, self.source_path).replace(os.sep, '/')
+
+    def record(self, includer, included):
+        """
+        Record that one document includes another.
+
+        Args:
+            includer (str):     Key of the document doing the including.
+            included (str):     Key of the document it includes.
+        """
+        with self._lock:
+            self._includes.setdefault(includer, set()).add(included)
+
+    def dependents(self, keys):
+        """
+        Find every document that includes any of the given documents,
+            directly or through other includes, as of the last build.
+
+        Args:
+            keys (iterable):    Keys of documents that changed.
+
+        Returns:
+            set:    Keys of the documents that include them, not counting
+                        the documents themselves.
+        """
+        included_by = {}
+        for includer, included in self.previous.items():
+            for key in included:
+                included_by.setdefault(key, set()).add(includer)
+
+        found = set()
+        pending = list(keys)
+        while pending:
+            for includer in included_by.get(pending.pop(), ()):
+                if includer not in found:
+                    found.add(includer)
+                    pending.append(includer)
+
+        return found - set(keys)
+
+    def write(self, rendered, existing):
+        """
+        Write out the graph for the next build.
+
+        Args:
+            rendered (iterable):    Keys of the documents this build
+                                        rendered. Their includes are
+                                        replaced by what was recorded.
+            existing (iterable):    Keys of every document on the site.
+                                        Anything else is forgotten.
+        """
+        existing = set(existing)
+        graph = dict((k, v) for k, v in self.previous.items() if k in existing)
+        with self._lock:
+            for key in rendered:
+                graph.pop(key, None)
+            for includer, included in self._includes.items():
+                if includer in existing:
+                    graph[includer] = sorted(included)
+
+        if graph != self.previous:
+            utils.write_json_atomic(self.path, graph, sort_keys=True, indent=2)
+
+    def _read(self):
+        """
+        Read the graph the last build left.
+
+        Returns:
+            dict
+        """
+        if not utils.file_exists(self.path):
+            return {}
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                return {}
@@ -0,0 +1,155 @@
+"""
+locales.py:
+    The languages a site is published in.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import posixpath
+from collections import ChainMap, namedtuple
+
+from stasipy.errors import StasipyException
+
+# What to render for one locale. "all_posts" is every post in the locale,
+#   for meta pages to list, whether or not it's being rendered.
+LocaleBuild = namedtuple('LocaleBuild', ['locale', 'posts', 'pages', 'meta_pages', 'all_posts', 'to_prepare'])
+
+
+class Locale(object):
+    """
+    One language a site is published in.
+
+    The default locale is rendered at the root of the site, just like a site
+        without locales. Every other locale is rendered under "/<code>/".
+        Each locale layers its own config from "siteconfig.yml" over the
+        site's, so anything (the site name, the description, nav items) can
+        be translated.
+    """
+
+    def __init__(self, code, config, site_vars, default=False):
+        """
+        Constructor
+
+        Args:
+            code (str):         The locale's code, e.g. "de". None for a
+                                    site without locales.
+            config (dict):      Site config for just this locale.
+            site_vars (dict):   The site's config, shared by every locale.
+            default (bool):     Whether this is the default locale.
+        """
+        self.code = code
+        self.default = default
+        self.prefix = '' if default else code
+
+        # Per build variables (navbar, url_for, etc) go in the top layer.
+        self.build_vars = {'locale': code}
+        self.site_vars = ChainMap(self.build_vars, config or {}, site_vars)
+
+    def output_path(self, relpath):
+        """
+        Where a file ends up for this locale, relative to the output
+            directory.
+
+        Args:
+            relpath (str):  The path the file would have on a site without
+                                locales.
+
+        Returns:
+            str
+        """
+        return os.path.join(self.prefix, relpath) if self.prefix else relpath
+
+    def href(self, href):
+        """
+        Where a link points for this locale.
+
+        Args:
+            href (str):     The href on a site without locales.
+
+        Returns:
+            str
+        """
+        if not self.prefix or '://' in href:
+            return href
+
+        return '/{0}{1}'.format(self.prefix, href)
+
+    def __repr__(self):
+        return 'Locale({0!r})'.format(self.code)
+
+
+def read_locales(site_vars):
+    """
+    Read the locales a site is published in from its config. Locales can be
+        a list of codes, or a mapping of codes to config for that locale:
+
+        default_locale: en
+        locales:
+            en: {}
+            de:
+                description: Eine Website
+
+    Args:
+        site_vars (dict):   The site's config.
+
+    Returns:
+        list:   Locale objects, default first. A site without locales gets a
+                    single default Locale with no code.
+    """
+    configured = site_vars.get('locales')
+    if not configured:
+        return [Locale(None, {}, site_vars, default=True)]
+
+    if not isinstance(configured, dict):
+        configured = dict((code, {}) for code in configured)
+
+    codes = [str(code) for code in configured]
+    default_code = str(site_vars.get('default_locale', codes[0]))
+    if default_code not in codes:
+        raise StasipyException('default_locale "{0}" is not one of the configured locales: {1}'
+                               .format(default_code, ', '.join(codes)))
+
+    codes.remove(default_code)
+    return [
+        Locale(code, configured.get(code) or {}, site_vars, default=code == default_code)
+        for code in [default_code] + codes
+    ]
+
+
+def locale_of(path, codes):
+    """
+    Work out which locale a document variant is written in, from its file
+        name. "post/foo.de.md" is the "de" variant of "post/foo.md".
+
+    Args:
+        path (str):     Path to the document.
+        codes (list):   The codes of every configured locale.
+
+    Returns:
+        str, or None if the document isn't a variant.
+    """
+    parts = os.path.basename(path).split('.')
+    if len(parts) > 2 and parts[1] in codes:
+        return parts[1]
+
+    return None
+
+
+def strip_locale(relpath, code):
+    """
+    Get the path of the document a variant translates.
+
+    Args:
+        relpath (str):  Path to the variant, with forward slashes.
+        code (str):     The variant's locale.
+
+    Returns:
+        str
+    """
+    dirname, basename = posixpath.split(relpath)
+    parts = basename.split('.')
+    if code is not None and len(parts) > 2 and parts[1] == code:
+        del parts[1]
+
+    return posixpath.join(dirname, '.'.join(parts))
@@ -0,0 +1,111 @@
+"""
+lock.py:
+    An advisory lock that keeps overlapping builds from stepping on each
+        other.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import time
+
+import stasipy.utils as utils
+from stasipy.errors import StasipyException
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class BuildLock(object):
+    """
+    An advisory lock on a site, held for the length of a build.
+
+    A second build of the same site (from CI, a watch job, whatever) waits
+        for the first to finish, rather than writing over it. Builds of
+        different sites only wait on each other when they write to the same
+        place. The lock is an flock on a file in ".stasipy" (or next to the
+        output), so it goes away with the process holding it, even if that
+        process is killed. On platforms without fcntl, builds
+        aren't locked.
+    """
+
+    # How long to sleep between attempts to take the lock, in seconds.
+    poll_interval = 0.1
+
+    def __init__(self, path, timeout=None):
+        """
+        Constructor
+
+        Args:
+            path (str):         The lock file.
+            timeout (float):    How long to wait for the lock, in seconds.
+                                    None waits forever.
+        """
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+
+    def acquire(self):
+        """
+        Take the lock, waiting for whoever has it if we have to.
+
+        Raises:
+            StasipyException:   If the lock wasn't free within the timeout.
+        """
+        if fcntl is None or self._fd is not None:
+            return
+
+        utils.ensure_directory_exists(os.path.dirname(self.path))
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.time() + self.timeout
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except (BlockingIOError, PermissionError):
+                if deadline is not None and time.time() >= deadline:
+                    os.close(fd)
+                    raise StasipyException('Timed out waiting for another build to release "{0}" ({1})'
+                                           .format(self.path, self._holder()))
+                if not waiting:
+                    utils.print_err('Waiting for another build to finish ({0}).'.format(self._holder()))
+                    waiting = True
+                time.sleep(self.poll_interval)
+
+        # Leave a note saying who has the lock, for anyone left waiting.
+        os.ftruncate(fd, 0)
+        os.write(fd, '{0}\n'.format(os.getpid()).encode('utf-8'))
+        self._fd = fd
+
+    def release(self):
+        """
+        Let go of the lock.
+        """
+        if self._fd is None:
+            return
+
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def _holder(self):
+        """
+        Describe who holds the lock, going by the note they left.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                pid = f.read().strip()
+        except OSError:
+            pid = ''
+
+        return 'pid {0}'.format(pid) if pid else 'unknown process'
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,230 @@
+"""
+manifest.py:
+    Keeps track of what changed in the output directory between builds.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import json
+from datetime import datetime
+
+import stasipy.utils as utils
+
+
+class BuildManifest(object):
+    """
+    A record of every file in the output directory, along with its content
+        hash, and which of those files were added, modified, or deleted
+        relative to the previous build.
+
+    The manifest is written out as JSON, so deploy tooling can upload (or
+        purge from a CDN) only the paths that actually changed. Files written
+        to a directory also have their size and mtime recorded, so the next
+        build can tell whether a hash still describes what's on disk.
+    """
+
+    added = 'added'
+    modified = 'modified'
+    deleted = 'deleted'
+
+    def __init__(self, path):
+        """
+        Constructor
+
+        Args:
+            path (str):     Path on disk to read the previous manifest from,
+                                and to write the new one to. If None, the
+                                manifest only lives in memory.
+        """
+        self.path = path
+        previous = self._read_previous()
+        self.previous_hashes = previous.get('files', {})
+        self.previous_stats = previous.get('stats', {})
+        self.hashes = {}
+        self.stats = {}
+        self.changes = {
+            self.added: [],
+            self.modified: [],
+            self.deleted: [],
+        }
+
+    def _read_previous(self):
+        """
+        Read the manifest written by the previous build.
+
+        Returns:
+            dict
+        """
+        if self.path is None or not utils.file_exists(self.path):
+            return {}
+
+        with open(self.path, 'r') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                # A corrupt manifest just means we can't trust what's
+                #   in "out", so treat this like a first build.
+                return {}
+
+    def previous_hash(self, relpath):
+        """
+        Get the hash a file had at the end of the previous build.
+
+        Args:
+            relpath (str):  Path of the file relative to the output directory.
+
+        Returns:
+            str, or None if the file wasn't part of the previous build.
+        """
+        return self.previous_hashes.get(self._normalize(relpath))
+
+    def previous_hash_on_disk(self, relpath, stat):
+        """
+        Get the hash a file had at the end of the previous build, but only if
+            the file on disk still has the size and mtime it had then, so a
+            file changed by something other than Stasipy isn't trusted.
+
+        Args:
+            relpath (str):          Path of the file relative to the output
+                                        directory.
+            stat (os.stat_result):  The file as it is on disk now.
+
+        Returns:
+            str, or None if the file wasn't part of the previous build, or
+                has changed since.
+        """
+        relpath = self._normalize(relpath)
+        if self.previous_stats.get(relpath) != self._stat(stat):
+            return None
+
+        return self.previous_hashes.get(relpath)
+
+    def contains(self, relpath):
+        """
+        Check if a file has been recorded as part of this build.
+
+        Args:
+            relpath (str):  Path of the file relative to the output directory.
+
+        Returns:
+            bool
+        """
+        return self._normalize(relpath) in self.hashes
+
+    def record(self, relpath, content_hash, change=None, stat=None):
+        """
+        Record a file that is part of this build.
+
+        Args:
+            relpath (str):          Path of the file relative to the output
+                                        directory.
+            content_hash (str):     Hash of the file's contents.
+            change (str):           One of "added" or "modified". None if
+                                        the file is unchanged.
+            stat (os.stat_result):  The file as it was left on disk, if it
+                                        was written to a directory.
+        """
+        relpath = self._normalize(relpath)
+        self.hashes[relpath] = content_hash
+        if stat is not None:
+            self.stats[relpath] = self._stat(stat)
+        if change is not None:
+            self.changes[change].append(relpath)
+
+    def carry_over_previous(self):
+        """
+        Record every file from the previous build that this build didn't
+            touch as unchanged, for builds that only wrote part of the site.
+        """
+        for relpath, content_hash in self.previous_hashes.items():
+            if relpath not in self.hashes:
+                self.hashes[relpath] = content_hash
+                if relpath in self.previous_stats:
+                    self.stats[relpath] = self.previous_stats[relpath]
+
+    def discard(self):
+        """
+        Forget everything recorded by this build, for when the output was
+            left exactly as the previous build left it.
+        """
+        self.hashes = dict(self.previous_hashes)
+        self.stats = dict(self.previous_stats)
+        for relpaths in self.changes.values():
+            del relpaths[:]
+
+    def record_deleted(self, relpath):
+        """
+        Record a file that was removed from the output directory.
+
+        Args:
+            relpath (str):  Path of the file relative to the output directory.
+        """
+        self.changes[self.deleted].append(self._normalize(relpath))
+
+    def write(self):
+        """
+        Write the manifest out to disk.
+        """
+        if self.path is None:
+            return
+
+        manifest = {
+            'generated': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'files': self.hashes,
+            'stats': self.stats,
+        }
+        for change, relpaths in self.changes.items():
+            hashes = self.previous_hashes if change == self.deleted else self.hashes
+            manifest[change] = [
+                {
+                    'path': relpath,
+                    'href': self._href(relpath),
+                    'hash': hashes.get(relpath),
+                } for relpath in sorted(relpaths)
+            ]
+
+        utils.write_json_atomic(self.path, manifest, indent=2, sort_keys=True)
+
+    def summary(self):
+        """
+        Give me a human friendly summary of what changed.
+
+        Returns:
+            str
+        """
+        return '{added} added, {modified} modified, {deleted} deleted, {unchanged} unchanged.'.format(
+            **self.counts())
+
+    def counts(self):
+        """
+        Count the files in this build by how they changed.
+
+        Returns:
+            dict:   "added", "modified", "deleted" and "unchanged" counts.
+        """
+        return {
+            self.added: len(self.changes[self.added]),
+            self.modified: len(self.changes[self.modified]),
+            self.deleted: len(self.changes[self.deleted]),
+            'unchanged': len(self.hashes) - len(self.changes[self.added]) - len(self.changes[self.modified]),
+        }
+
+    @staticmethod
+    def _stat(stat):
+        """
+        The part of a file's stat worth remembering between builds.
+        """
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def _normalize(self, relpath):
+        """
+        Manifest paths always use forward slashes, regardless of platform.
+        """
+        return relpath.replace(os.sep, '/')
+
+    def _href(self, relpath):
+        """
+        Get the URL a file in the output directory is served from.
+        """
+        return '/{0}'.format(relpath)
@@ -0,0 +1,189 @@
+"""
+metrics.py:
+    Build metrics, in Prometheus' text format.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import sys
+import time
+import threading
+import contextlib
+
+import stasipy.utils as utils
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class BuildMetrics(object):
+    """
+    Keeps track of how a build went, and writes it out for node_exporter's
+        textfile collector to pick up:
+
+        $ stasipy generate ./my_site --metrics-file /var/lib/node_exporter/stasipy.prom
+
+    Every metric is a gauge describing the most recent build, labelled with
+        the site's name.
+    """
+
+    prefix = 'stasipy'
+
+    def __init__(self, site_name):
+        """
+        Constructor
+
+        Args:
+            site_name (str):    The name of the site being built.
+        """
+        self.site_name = site_name
+        self.started = time.time()
+        self.durations = {}
+        self.plugin_durations = {}
+        self._samples = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Time a phase of the build. A phase that runs more than once (once
+            per locale, say) adds up.
+
+        Args:
+            name (str):     The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def plugin(self, name, stage):
+        """
+        Time a plugin's hook.
+
+        Args:
+            name (str):     The hook's name.
+            stage (str):    The stage it hooked into.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                key = (name, stage)
+                self.plugin_durations[key] = self.plugin_durations.get(key, 0.0) + time.perf_counter() - start
+
+    def set(self, name, value, help_text, **labels):
+        """
+        Set a gauge.
+
+        Args:
+            name (str):         The metric's name, without the "stasipy_"
+                                    prefix.
+            value (float):      Its value.
+            help_text (str):    What it measures.
+            labels (dict):      Labels for this sample, on top of "site".
+        """
+        self._help[name] = help_text
+        self._samples.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def finish(self, success, sink=None, caches=None, documents=None):
+        """
+        Fill in everything that's only known once the build is over.
+
+        Args:
+            success (bool):             Whether the build succeeded.
+            sink (OutputSink):          The sink the site was written to.
+            caches (dict):              Cache name to (hits, misses).
+            documents (dict):           Page type to how many documents of
+                                            that type there are.
+        """
+        self.set('build_success', 1 if success else 0, 'Whether the last build succeeded.')
+        self.set('build_last_run_timestamp_seconds', self.started, 'When the last build started.')
+        self.set('build_duration_seconds', time.time() - self.started, 'How long each phase of the build took.',
+                 phase='total')
+        for phase, duration in self.durations.items():
+            self.set('build_duration_seconds', duration, 'How long each phase of the build took.', phase=phase)
+
+        for (plugin, stage), duration in self.plugin_durations.items():
+            self.set('plugin_duration_seconds', duration, 'How long each plugin hook took.',
+                     plugin=plugin, stage=stage)
+
+        for page_type, count in sorted((documents or {}).items()):
+            self.set('documents', count, 'How many documents the site has, by type.', type=page_type)
+
+        for cache, (hits, misses) in sorted((caches or {}).items()):
+            self.set('cache_hits', hits, 'Cache hits during the build.', cache=cache)
+            self.set('cache_misses', misses, 'Cache misses during the build.', cache=cache)
+
+        if sink is not None:
+            self.set('output_bytes_written', sink.bytes_written,
+                     'How many bytes had to be written to the output.')
+            for change, count in sorted(sink.manifest.counts().items()):
+                self.set('output_files', count, 'Output files, by how they changed since the last build.',
+                         change=change)
+
+        peak_rss = self._peak_rss()
+        if peak_rss is not None:
+            self.set('peak_rss_bytes', peak_rss, 'Peak resident memory of the build process.')
+
+    def write(self, path):
+        """
+        Write out the metrics. The file is renamed into place, so the
+            collector never reads half of it.
+
+        Args:
+            path (str):     Where to write them. node_exporter only reads
+                                files ending in ".prom".
+        """
+        utils.write_text_atomic(path, self.render())
+
+    def render(self):
+        """
+        Render the metrics in Prometheus' text format.
+
+        Returns:
+            str
+        """
+        lines = []
+        for name in sorted(self._samples):
+            full_name = '{0}_{1}'.format(self.prefix, name)
+            lines.append('# HELP {0} {1}'.format(full_name, self._help[name]))
+            lines.append('# TYPE {0} gauge'.format(full_name))
+            for labels, value in sorted(self._samples[name].items()):
+                labels = (('site', self.site_name),) + labels
+                lines.append('{0}{{{1}}} {2}'.format(
+                    full_name,
+                    ','.join('{0}="{1}"'.format(k, self._escape(v)) for k, v in labels),
+                    repr(float(value)) if isinstance(value, float) else value,
+                ))
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _escape(value):
+        """
+        Escape a label value.
+        """
+        return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+    @staticmethod
+    def _peak_rss():
+        """
+        Get the peak resident memory of this process, in bytes.
+
+        Returns:
+            int, or None where that can't be found out.
+        """
+        if resource is None:
+            return None
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes.
+        return peak if sys.platform == 'darwin' else peak * 1024
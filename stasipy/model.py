@@ -0,0 +1,119 @@
+"""
+model.py:
+    A site's parsed source, kept in memory between builds.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import threading
+
+
+def _stamp(stat):
+    """
+    What has to stay the same for a file to count as unchanged.
+
+    Args:
+        stat (os.stat_result):  The file's stat, or None if it doesn't exist.
+
+    Returns:
+        tuple
+    """
+    if stat is None:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class SiteModel(object):
+    """
+    The parsed site config and documents of a site, for a process that
+        builds the same site over and over (see "stasipy daemon").
+
+    Anything whose file hasn't changed since it was last read is handed
+        back as is. Documents bake bits of the site config in when they're
+        created, so they're all thrown away whenever the config changes,
+        and documents whose files have gone away are forgotten after each
+        discovery.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._config = None
+        self._documents = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+
+        # How many documents the last discovery reused, and how many it had
+        #   to read.
+        self.reused = 0
+        self.loaded = 0
+
+    def site_config(self, path, loader):
+        """
+        Get the site config.
+
+        Args:
+            path (str):         Path to "siteconfig.yml".
+            loader (callable):  Reads and parses the config.
+
+        Returns:
+            dict
+        """
+        try:
+            stamp = _stamp(os.stat(path))
+        except OSError:
+            stamp = None
+
+        with self._lock:
+            if self._config is None or self._config[0] != stamp:
+                self._config = (stamp, loader())
+                self._documents.clear()
+
+            return self._config[1]
+
+    def begin_discovery(self):
+        """
+        Start keeping track of which documents still exist.
+        """
+        with self._lock:
+            self._seen = set()
+            self.reused = 0
+            self.loaded = 0
+
+    def document(self, path, stat, loader):
+        """
+        Get a document.
+
+        Args:
+            path (str):             Path to the document.
+            stat (os.stat_result):  The document's current stat.
+            loader (callable):      Reads the document, if it changed.
+
+        Returns:
+            Document
+        """
+        stamp = _stamp(stat)
+        with self._lock:
+            self._seen.add(path)
+            cached = self._documents.get(path)
+            if cached is not None and cached[0] == stamp:
+                self.reused += 1
+                return cached[1]
+
+        doc = loader()
+        with self._lock:
+            self._documents[path] = (stamp, doc)
+            self.loaded += 1
+
+        return doc
+
+    def end_discovery(self):
+        """
+        Forget any document that wasn't seen since "begin_discovery".
+        """
+        with self._lock:
+            for path in set(self._documents) - self._seen:
+                del self._documents[path]
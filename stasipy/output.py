@@ -0,0 +1,725 @@
+"""
+output.py:
+    Sinks the generated site is written into: a directory, an archive, or
+        memory.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import io
+import time
+import queue
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import threading
+from abc import ABCMeta, abstractmethod
+from multiprocessing.pool import ThreadPool
+
+import stasipy.utils as utils
+from stasipy.manifest import BuildManifest
+from stasipy.errors import StasipyException
+
+
+def sink_class_for(path):
+    """
+    Work out which kind of sink an output path asks for, by its extension.
+
+    Args:
+        path (str):     Where the site should be written.
+
+    Returns:
+        class:          An OutputSink subclass.
+    """
+    if path == MemorySink.path:
+        return MemorySink
+    for extensions, sink_class in ((TarSink.extensions, TarSink), (ZipSink.extensions, ZipSink)):
+        if path.lower().endswith(extensions):
+            return sink_class
+
+    return DirectorySink
+
+
+def open_sink(path, manifest, workers, partial=False, pool=None):
+    """
+    Open the right kind of sink for an output path.
+
+    Args:
+        path (str):                 Where the site should be written. A path
+                                        ending in ".tar", ".tar.gz", ".tgz"
+                                        or ".zip" is written as an archive,
+                                        ":memory:" is kept in memory, and
+                                        anything else is a directory.
+        manifest (BuildManifest):   Where to record what was written.
+        workers (int):              How many threads to write with.
+        partial (bool):             Whether only part of the site is being
+                                        written.
+        pool (ThreadPool):          A thread pool to write with, shared with
+                                        other builds, rather than one of
+                                        the sink's own.
+
+    Returns:
+        OutputSink
+    """
+    sink_class = sink_class_for(path)
+    if sink_class is MemorySink:
+        return MemorySink(manifest, partial=partial)
+    if sink_class is DirectorySink:
+        return DirectorySink(path, manifest, workers, partial=partial, pool=pool)
+    if partial:
+        raise StasipyException('Archives are always written whole, so a targeted build needs a directory '
+                               'to write to, not "{0}"'.format(path))
+
+    return sink_class(path, manifest)
+
+
+class OutputSink(metaclass=ABCMeta):
+    """
+    Somewhere the generated site is written to.
+
+    Rendered documents and static files are handed to a sink as they're
+        ready, and the sink records every one in the build manifest. Once
+        everything has been handed over, the sink is either closed (making
+        the site available) or aborted.
+    """
+
+    def __init__(self, manifest, partial=False):
+        """
+        Constructor
+
+        Args:
+            manifest (BuildManifest):   Where to record what was written.
+            partial (bool):             Whether only part of the site is
+                                            being written. If so, nothing
+                                            else already in the sink is
+                                            touched.
+        """
+        self.manifest = manifest
+        self.partial = partial
+        self._lock = threading.Lock()
+
+        # How many bytes actually had to be written.
+        self.bytes_written = 0
+
+    def prepare_directories(self, relpaths):
+        """
+        Get ready for the given files to be written. Only sinks backed by a
+            real directory have anything to do here.
+
+        Args:
+            relpaths (iterable):    Paths of files, relative to the root of
+                                        the site, that are about to be
+                                        written.
+        """
+        pass
+
+    @abstractmethod
+    def write(self, relpath, content):
+        """
+        Hand over some content to be written.
+
+        Args:
+            relpath (str):      Path of the file relative to the root of the
+                                    site.
+            content (str):      What to write. Unicode will be encoded
+                                    as utf-8.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def copy(self, relpath, src_path):
+        """
+        Hand over a file to be copied in as is.
+
+        Args:
+            relpath (str):      Path of the file relative to the root of the
+                                    site.
+            src_path (str):     Path of the file to copy.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def close(self):
+        """
+        Wait for everything handed over to be written, and make the site
+            available.
+
+        Raises:
+            Whatever the first failed write raised.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def abort(self):
+        """
+        Stop writing, leaving the manifest describing whatever is really
+            in the sink.
+        """
+        raise NotImplementedError()
+
+    def _record(self, relpath, content_hash, change, written=0, stat=None):
+        """
+        Record a file in the manifest. Safe to call from any thread.
+
+        Args:
+            relpath (str):          Path of the file relative to the root of
+                                        the site.
+            content_hash (str):     Hash of the file's contents.
+            change (str):           How the file changed. See
+                                        "BuildManifest.record".
+            written (int):          How many bytes were written for it.
+            stat (os.stat_result):  The file as it was left on disk, if it
+                                        was written to a directory.
+        """
+        with self._lock:
+            self.manifest.record(relpath, content_hash, change, stat=stat)
+            self.bytes_written += written
+
+    def _change_since_previous_build(self, relpath, content_hash):
+        """
+        Work out how a file differs from the previous build, going only on
+            what the manifest says.
+
+        Returns:
+            str:    "added", "modified", or None if nothing changed.
+        """
+        previous_hash = self.manifest.previous_hash(relpath)
+        if previous_hash is None:
+            return BuildManifest.added
+        if previous_hash != content_hash:
+            return BuildManifest.modified
+
+        return None
+
+    def _record_deleted_files(self):
+        """
+        Record everything from the previous build that isn't part of this
+            one as deleted.
+        """
+        for relpath in sorted(self.manifest.previous_hashes):
+            if not self.manifest.contains(relpath):
+                self.manifest.record_deleted(relpath)
+
+
+class DirectorySink(OutputSink):
+    """
+    Writes files straight into the output directory from a bounded pool of
+        threads, so whoever is rendering rarely has to wait on the disk. Only
+        so many files can be waiting on the threads at once, though, so a
+        slow disk holds up rendering rather than every page piling up in
+        memory.
+
+    Every file is written to a uniquely named temp file next to its final
+        location and renamed into place, so readers only ever see complete
+        files. Files whose contents haven't changed since the last build
+        aren't touched at all.
+    """
+
+    # How many files can be waiting on each writer thread before whoever is
+    #   rendering has to wait.
+    queue_size_per_worker = 16
+
+    def __init__(self, out_path, manifest, workers, partial=False, pool=None):
+        """
+        Constructor
+
+        Args:
+            out_path (str):             The output directory.
+            manifest (BuildManifest):   Where to record what was written.
+            workers (int):              How many threads to write with.
+            partial (bool):             Whether only part of the site is
+                                            being written. If so, nothing
+                                            else in the output directory
+                                            is touched.
+            pool (ThreadPool):          A thread pool shared with other
+                                            builds, to write with instead of
+                                            starting one. It's left running.
+        """
+        super().__init__(manifest, partial=partial)
+        self.out_path = out_path
+        self._owns_pool = pool is None
+        self.pool = ThreadPool(workers) if pool is None else pool
+        self._pending = []
+        self._queued = threading.BoundedSemaphore(self.queue_size_per_worker * workers)
+        self._directories = set()
+
+        # mkstemp creates files only we can read, so work out the mode a
+        #   normally created file would have gotten.
+        umask = os.umask(0)
+        os.umask(umask)
+        self._file_mode = 0o666 & ~umask
+
+    def prepare_directories(self, relpaths):
+        """
+        Create every directory the given files will need, up front, so the
+            writer threads don't have to.
+        """
+        for relpath in relpaths:
+            self._ensure_directory(os.path.dirname(os.path.join(self.out_path, relpath)))
+
+    def write(self, relpath, content):
+        """
+        Queue up some content to be written.
+        """
+        self._queue(self._write, (relpath, content))
+
+    def copy(self, relpath, src_path):
+        """
+        Queue up a file to be copied into the output directory as is.
+        """
+        self._queue(self._copy, (relpath, src_path))
+
+    def _queue(self, func, args):
+        """
+        Hand some work to the writer threads, first waiting for room if too
+            much is already waiting on them.
+        """
+        self._queued.acquire()
+        self._pending.append(self.pool.apply_async(func, args,
+                                                   callback=self._dequeued,
+                                                   error_callback=self._dequeued))
+
+    def _dequeued(self, _):
+        """
+        Make room for another file, once one has been written (or failed to
+            be).
+        """
+        self._queued.release()
+
+    def close(self):
+        """
+        Wait for everything queued to be written, then remove anything in
+            the output directory that wasn't part of this build (unless this
+            is a partial build).
+        """
+        if self._owns_pool:
+            self.pool.close()
+            self.pool.join()
+        for result in self._pending:
+            result.get()
+
+        if self.partial:
+            self.manifest.carry_over_previous()
+        else:
+            self._remove_stale_files()
+
+    def abort(self):
+        """
+        Stop writing. Files that already made it into place stay there, and
+            are recorded in the manifest along with what the previous build
+            left behind, so the next build knows what's really on disk.
+        """
+        if self._owns_pool:
+            self.pool.terminate()
+            self.pool.join()
+        else:
+            # Other builds still need a shared pool, so let whatever is
+            #   already queued finish instead.
+            for result in self._pending:
+                result.wait()
+        self.manifest.carry_over_previous()
+
+    def _write(self, relpath, content):
+        """
+        Write some content, unless it's identical to what's already there.
+        """
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+
+        content_hash = utils.hash_content(content)
+        out_fpath = os.path.join(self.out_path, relpath)
+        change, stat = self._detect_change(relpath, out_fpath, content_hash)
+        if change is not None:
+            with self._open_temp_file(out_fpath) as (f, tmp_path):
+                f.write(content)
+            os.replace(tmp_path, out_fpath)
+            stat = os.stat(out_fpath)
+
+        self._record(relpath, content_hash, change, written=len(content) if change is not None else 0, stat=stat)
+
+    def _copy(self, relpath, src_path):
+        """
+        Copy a file, unless it's identical to what's already there.
+        """
+        content_hash = utils.hash_file(src_path)
+        out_fpath = os.path.join(self.out_path, relpath)
+        change, stat = self._detect_change(relpath, out_fpath, content_hash)
+        written = 0
+        if change is not None:
+            with self._open_temp_file(out_fpath) as (f, tmp_path):
+                with open(src_path, 'rb') as src:
+                    shutil.copyfileobj(src, f)
+                written = f.tell()
+            os.replace(tmp_path, out_fpath)
+            stat = os.stat(out_fpath)
+
+        self._record(relpath, content_hash, change, written=written, stat=stat)
+
+    def _detect_change(self, relpath, out_fpath, content_hash):
+        """
+        Work out how a file differs from what's already in the output
+            directory.
+
+        Returns:
+            tuple:  (change, stat), where change is "added", "modified", or
+                        None if nothing changed, and stat is the output
+                        file's os.stat_result, or None if it isn't there.
+        """
+        if not os.path.isfile(out_fpath):
+            return BuildManifest.added, None
+
+        stat = os.stat(out_fpath)
+
+        # Trust the hash from the last build, rather than reading the whole
+        #   output file back in, unless the file has changed since.
+        out_hash = self.manifest.previous_hash_on_disk(relpath, stat) or utils.hash_file(out_fpath)
+        if out_hash == content_hash:
+            return None, stat
+
+        return BuildManifest.modified, stat
+
+    def _open_temp_file(self, out_fpath):
+        """
+        Open a uniquely named temp file next to where a file is going to end
+            up, so it can be renamed into place.
+
+        Returns:
+            _TempFile
+        """
+        self._ensure_directory(os.path.dirname(out_fpath))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_fpath),
+                                        prefix='.{0}.'.format(os.path.basename(out_fpath)),
+                                        suffix='.tmp')
+        os.chmod(tmp_path, self._file_mode)
+        return _TempFile(fd, tmp_path)
+
+    def _ensure_directory(self, fpath):
+        """
+        Create a directory, unless we already know it's there.
+        """
+        if fpath in self._directories:
+            return
+
+        with self._lock:
+            utils.ensure_directory_exists(fpath)
+            self._directories.add(fpath)
+
+    def _remove_stale_files(self):
+        """
+        Remove anything that is no longer part of the site. Walk bottom up,
+            so directories emptied along the way can be removed too.
+        """
+        for root, folders, files in os.walk(self.out_path, topdown=False):
+            for fname in files:
+                out_fpath = os.path.join(root, fname)
+                relpath = os.path.relpath(out_fpath, self.out_path)
+                if not self.manifest.contains(relpath):
+                    os.remove(out_fpath)
+                    self.manifest.record_deleted(relpath)
+            if root != self.out_path and not os.listdir(root):
+                os.rmdir(root)
+
+
+class ArchiveSink(OutputSink):
+    """
+    Streams the site into a single archive file, so a deployable artifact
+        comes out of the build without another pass over the output.
+
+    Archives can't be written to from more than one thread, so files are
+        handed to a single writer thread through a bounded queue. The archive
+        is written to a uniquely named temp file next to where it's going,
+        and only renamed into place once it's complete.
+    """
+
+    # Extensions (lowercase) that select this kind of archive.
+    extensions = ()
+
+    # How many files can be waiting on the writer thread before whoever is
+    #   rendering has to wait.
+    queue_size = 64
+
+    def __init__(self, path, manifest):
+        """
+        Constructor
+
+        Args:
+            path (str):                 Where to write the archive.
+            manifest (BuildManifest):   Where to record what was written.
+        """
+        super().__init__(manifest)
+        self.path = path
+        self.timestamp = time.time()
+        self._queue = queue.Queue(self.queue_size)
+        self._error = None
+
+        out_dir = os.path.dirname(os.path.abspath(path))
+        utils.ensure_directory_exists(out_dir)
+        fd, self._tmp_path = tempfile.mkstemp(dir=out_dir,
+                                              prefix='.{0}.'.format(os.path.basename(path)),
+                                              suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+        self._archive = self._open_archive(self._file)
+        self._thread = threading.Thread(target=self._drain, name='stasipy-archive-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, relpath, content):
+        """
+        Queue up some content to be added to the archive.
+        """
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+
+        self._put((self._add_content, relpath, content))
+
+    def copy(self, relpath, src_path):
+        """
+        Queue up a file to be added to the archive as is.
+        """
+        self._put((self._add_file, relpath, src_path))
+
+    def close(self):
+        """
+        Wait for the writer thread to finish, then move the archive into
+            place.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+        self._close_archive(self._archive)
+        self._file.close()
+
+        # mkstemp creates files only we can read, so give the archive the
+        #   mode a normally created file would have gotten.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp_path, 0o666 & ~umask)
+        os.replace(self._tmp_path, self.path)
+
+        self._record_deleted_files()
+
+    def abort(self):
+        """
+        Stop writing, and throw away the half written archive. Whatever
+            archive was there before is left alone, so the manifest goes on
+            describing it.
+        """
+        self._error = self._error or StasipyException('Aborted.')
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            self._file.close()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+        self.manifest.discard()
+
+    def _put(self, item):
+        """
+        Hand something to the writer thread, unless it has already failed.
+        """
+        if self._error is not None:
+            raise self._error
+
+        self._queue.put(item)
+
+    def _drain(self):
+        """
+        The writer thread. Adds files to the archive until told to stop.
+            After an error, everything still queued is thrown away.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+
+            add, relpath, source = item
+            try:
+                content_hash, size = add(relpath.replace(os.sep, '/'), source)
+                self._record(relpath, content_hash, self._change_since_previous_build(relpath, content_hash),
+                             written=size)
+            except BaseException as e:
+                self._error = e
+
+    def _add_content(self, arcname, content):
+        """
+        Add some content to the archive.
+
+        Returns:
+            tuple:  (hash, size) of the content.
+        """
+        self._add(arcname, io.BytesIO(content), len(content))
+        return utils.hash_content(content), len(content)
+
+    def _add_file(self, arcname, src_path):
+        """
+        Add a file to the archive.
+
+        Returns:
+            tuple:  (hash, size) of the file.
+        """
+        with open(src_path, 'rb') as src:
+            size = os.fstat(src.fileno()).st_size
+            self._add(arcname, src, size)
+
+        return utils.hash_file(src_path), size
+
+    @abstractmethod
+    def _open_archive(self, fileobj):
+        """
+        Start a new archive in an open file.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _add(self, arcname, fileobj, size):
+        """
+        Add a member to the archive from an open file.
+        """
+        raise NotImplementedError()
+
+    def _close_archive(self, archive):
+        """
+        Finish off the archive.
+        """
+        archive.close()
+
+
+class TarSink(ArchiveSink):
+    """
+    Streams the site into a ".tar", or a gzipped ".tar.gz"/".tgz".
+    """
+
+    extensions = ('.tar', '.tar.gz', '.tgz')
+
+    def _open_archive(self, fileobj):
+        """
+        Start a tar stream, gzipped unless the path ends in ".tar".
+        """
+        mode = 'w|' if self.path.lower().endswith('.tar') else 'w|gz'
+        return tarfile.open(fileobj=fileobj, mode=mode, format=tarfile.PAX_FORMAT)
+
+    def _add(self, arcname, fileobj, size):
+        """
+        Add a member to the tar stream.
+        """
+        info = tarfile.TarInfo(arcname)
+        info.size = size
+        info.mtime = self.timestamp
+        info.mode = 0o644
+        self._archive.addfile(info, fileobj)
+
+
+class ZipSink(ArchiveSink):
+    """
+    Streams the site into a ".zip".
+    """
+
+    extensions = ('.zip',)
+
+    def _open_archive(self, fileobj):
+        """
+        Start a deflated zip.
+        """
+        return zipfile.ZipFile(fileobj, mode='w', compression=zipfile.ZIP_DEFLATED)
+
+    def _add(self, arcname, fileobj, size):
+        """
+        Add a member to the zip.
+        """
+        info = zipfile.ZipInfo(arcname, date_time=time.localtime(self.timestamp)[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        with self._archive.open(info, mode='w', force_zip64=size > zipfile.ZIP64_LIMIT) as f:
+            shutil.copyfileobj(fileobj, f)
+
+
+class MemorySink(OutputSink):
+    """
+    Keeps the site in memory, for previews, or for poking at a generated
+        site from code without touching the disk.
+    """
+
+    # The output path that selects this sink.
+    path = ':memory:'
+
+    def __init__(self, manifest, partial=False):
+        """
+        Constructor
+
+        Args:
+            manifest (BuildManifest):   Where to record what was written.
+            partial (bool):             Whether only part of the site is
+                                            being written.
+        """
+        super().__init__(manifest, partial=partial)
+        self.files = {}
+
+    def write(self, relpath, content):
+        """
+        Keep some content.
+        """
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+
+        self._keep(relpath, content)
+
+    def copy(self, relpath, src_path):
+        """
+        Keep a copy of a file.
+        """
+        with open(src_path, 'rb') as f:
+            self._keep(relpath, f.read())
+
+    def close(self):
+        """
+        Nothing to wait on. Just record what's gone since the last build.
+        """
+        if self.partial:
+            self.manifest.carry_over_previous()
+        else:
+            self._record_deleted_files()
+
+    def abort(self):
+        """
+        Nothing to stop. Whatever was written is still in "files".
+        """
+        pass
+
+    def _keep(self, relpath, content):
+        """
+        Store a file's content, and record it in the manifest.
+        """
+        relpath = relpath.replace(os.sep, '/')
+        content_hash = utils.hash_content(content)
+        with self._lock:
+            self.files[relpath] = content
+        self._record(relpath, content_hash, self._change_since_previous_build(relpath, content_hash),
+                     written=len(content))
+
+
+class _TempFile(object):
+    """
+    Context manager for a file descriptor from mkstemp, that cleans up the
+        temp file if anything goes wrong while writing it.
+    """
+
+    def __init__(self, fd, path):
+        self.fd = fd
+        self.path = path
+
+    def __enter__(self):
+        self.file = os.fdopen(self.fd, 'wb')
+        return self.file, self.path
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        if exc_type is not None:
+            os.remove(self.path)
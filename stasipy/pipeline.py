@@ -0,0 +1,258 @@
+"""
+pipeline.py:
+    The stages of a build, and the hooks plugins add to them.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import sys
+import importlib
+import threading
+
+from stasipy.errors import StasipyException
+
+# Every stage of a build, in the order they run.
+STAGES = (
+    'discover',
+    'parse',
+    'render',
+    'post_process',
+    'write',
+    'static',
+    'finalize',
+)
+
+# Stages that can be hooked per document, rather than once per build.
+DOCUMENT_STAGES = (
+    'parse',
+    'post_process',
+)
+
+# Plugins are imported with the site on "sys.path", which is global.
+_import_lock = threading.Lock()
+
+
+class PipelineContext(object):
+    """
+    What per build hooks get to see of a build. Attributes are filled in as
+        the build goes:
+
+        site_vars       The site config.
+        source_path     The "src" directory.
+        static_files    DiscoveredFile objects for everything in "static".
+        posts, pages,
+        meta_pages      Every document, in the default locale.
+        builds          LocaleBuild objects, one per locale, once planned.
+        sink            The OutputSink being written to, from "parse" on.
+    """
+
+    def __init__(self, site_vars, source_path):
+        """
+        Constructor
+
+        Args:
+            site_vars (dict):       The site config.
+            source_path (str):      The "src" directory.
+        """
+        self.site_vars = site_vars
+        self.source_path = source_path
+        self.static_files = []
+        self.posts = []
+        self.pages = []
+        self.meta_pages = []
+        self.builds = []
+        self.sink = None
+
+
+class BuildPipeline(object):
+    """
+    Runs a build as a series of named stages (see "STAGES"), timing each one,
+        along with the hooks plugins register on them.
+
+    Plugins are modules listed under "plugins" in "siteconfig.yml", each with
+        a "register" function that's handed the pipeline:
+
+        def register(pipeline):
+            pipeline.add_hook('post_process', minify, per_document=True)
+            pipeline.add_hook('finalize', write_feed)
+
+    Per build hooks are called with the PipelineContext once the stage's own
+        work is done, except "finalize" hooks, which run before the output is
+        closed so they can still write files. Per document hooks run in the
+        render threads (one per locale), so they must be thread safe:
+
+        parse           hook(document, context), once the document's summary
+                            and content are rendered.
+        post_process    hook(document, html, context), once the document is
+                            rendered. Returns the new HTML, or None to keep
+                            it as is.
+
+    Time spent in hooks counts towards their stage, and is also reported per
+        plugin, so a slow plugin is easy to spot. "write" also counts the
+        time spent waiting for the sink to finish writing, once every other
+        hook has run.
+    """
+
+    def __init__(self, site_vars, metrics):
+        """
+        Constructor
+
+        Args:
+            site_vars (dict):           The site config. Plugins can read
+                                            their own settings from it.
+            metrics (BuildMetrics):     Where to record stage and plugin
+                                            timings.
+        """
+        self.site_vars = site_vars
+        self.metrics = metrics
+        self._hooks = dict((stage, []) for stage in STAGES)
+        self._document_hooks = dict((stage, []) for stage in DOCUMENT_STAGES)
+        self._plugin = None
+
+    def load_plugins(self, search_path=None):
+        """
+        Import every plugin the site config lists, and let it register its
+            hooks.
+
+        Args:
+            search_path (str):  Somewhere else to import plugins from, for
+                                    plugins that live with the site.
+        """
+        names = self.site_vars.get('plugins') or []
+        if isinstance(names, str):
+            names = [names]
+
+        for name in names:
+            module = self._import(name, search_path)
+            register = getattr(module, 'register', None)
+            if not callable(register):
+                raise StasipyException('Plugin "{0}" has no "register" function.'.format(name))
+
+            self._plugin = name
+            try:
+                register(self)
+            finally:
+                self._plugin = None
+
+    def add_hook(self, stage, hook, per_document=False, name=None):
+        """
+        Register a hook.
+
+        Args:
+            stage (str):            The stage to hook into. See "STAGES".
+            hook (callable):        What to call.
+            per_document (bool):    Call it for every document, rather than
+                                        once per build. Only "parse" and
+                                        "post_process" allow it.
+            name (str):             What to call it in timings. Defaults to
+                                        the plugin's name and the hook's.
+        """
+        if stage not in STAGES:
+            raise StasipyException('No such build stage: "{0}". Stages are: {1}'.format(stage, ', '.join(STAGES)))
+        if per_document and stage not in DOCUMENT_STAGES:
+            raise StasipyException('The "{0}" stage can only be hooked once per build. Per document stages are: {1}'
+                                   .format(stage, ', '.join(DOCUMENT_STAGES)))
+
+        if name is None:
+            hook_name = getattr(hook, '__name__', hook.__class__.__name__)
+            name = '{0}.{1}'.format(self._plugin, hook_name) if self._plugin else hook_name
+
+        hooks = self._document_hooks if per_document else self._hooks
+        hooks[stage].append((name, hook))
+
+    def stage(self, name):
+        """
+        Time some of a stage's own work.
+
+        Args:
+            name (str):     The stage.
+
+        Returns:
+            A context manager.
+        """
+        return self.metrics.phase(name)
+
+    def run(self, stage, context):
+        """
+        Run a stage's per build hooks.
+
+        Args:
+            stage (str):                    The stage.
+            context (PipelineContext):      The build so far.
+        """
+        with self.stage(stage):
+            for name, hook in self._hooks[stage]:
+                with self.metrics.plugin(name, stage):
+                    hook(context)
+
+    def parse(self, document, context):
+        """
+        Run the per document "parse" hooks on a document.
+        """
+        hooks = self._document_hooks['parse']
+        if not hooks:
+            return
+
+        with self.stage('parse'):
+            for name, hook in hooks:
+                with self.metrics.plugin(name, 'parse'):
+                    hook(document, context)
+
+    def post_process(self, document, html, context):
+        """
+        Run the per document "post_process" hooks on a rendered document.
+
+        Returns:
+            str:    The HTML to write.
+        """
+        hooks = self._document_hooks['post_process']
+        if not hooks:
+            return html
+
+        with self.stage('post_process'):
+            for name, hook in hooks:
+                with self.metrics.plugin(name, 'post_process'):
+                    processed = hook(document, html, context)
+                if processed is not None:
+                    html = processed
+
+        return html
+
+    def report(self):
+        """
+        A human friendly report of how long each stage and plugin took.
+
+        Returns:
+            str
+        """
+        durations = self.metrics.durations
+        lines = ['Stage timings:']
+        for stage in STAGES:
+            if stage in durations:
+                lines.append('  {0:<14} {1:>9.1f}ms'.format(stage, durations[stage] * 1000))
+
+        plugin_durations = sorted(self.metrics.plugin_durations.items(), key=lambda item: -item[1])
+        if plugin_durations:
+            lines.append('Plugin timings, slowest first:')
+            for (name, stage), seconds in plugin_durations:
+                lines.append('  {0:<40} {1:>9.1f}ms  ({2})'.format(name, seconds * 1000, stage))
+
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _import(name, search_path):
+        """
+        Import a plugin, looking in the search path first.
+        """
+        with _import_lock:
+            added = search_path is not None and search_path not in sys.path
+            if added:
+                sys.path.insert(0, search_path)
+            try:
+                return importlib.import_module(name)
+            except ImportError as e:
+                raise StasipyException('Unable to import plugin "{0}": {1}'.format(name, e))
+            finally:
+                if added:
+                    sys.path.remove(search_path)
+
@@ -0,0 +1,73 @@
+"""
+pools.py:
+    Worker pools that outlive a single build.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+
+class WorkerPools(object):
+    """
+    Thread and process pools for a process that builds more than one site
+        (see "stasipy batch"), so every build reuses the same workers rather
+        than starting and tearing down its own.
+
+    Pools are created the first time a build asks for one, one per size, and
+        live until "close".
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._thread_pools = {}
+        self._process_pools = {}
+        self._lock = threading.Lock()
+
+    def threads(self, workers):
+        """
+        Get a pool of threads, for writing output.
+
+        Args:
+            workers (int):  How many threads.
+
+        Returns:
+            multiprocessing.pool.ThreadPool
+        """
+        with self._lock:
+            if workers not in self._thread_pools:
+                self._thread_pools[workers] = ThreadPool(workers)
+            return self._thread_pools[workers]
+
+    def processes(self, workers=None):
+        """
+        Get a pool of processes, for CPU bound work like encoding images.
+
+        Args:
+            workers (int):  How many processes. Defaults to the number of
+                                CPUs.
+
+        Returns:
+            multiprocessing.pool.Pool
+        """
+        with self._lock:
+            if workers not in self._process_pools:
+                self._process_pools[workers] = multiprocessing.Pool(workers)
+            return self._process_pools[workers]
+
+    def close(self):
+        """
+        Wait for every pool to finish its work, and shut it down.
+        """
+        with self._lock:
+            pools = list(self._thread_pools.values()) + list(self._process_pools.values())
+            self._thread_pools.clear()
+            self._process_pools.clear()
+
+        for pool in pools:
+            pool.close()
+            pool.join()
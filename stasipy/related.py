@@ -0,0 +1,254 @@
+"""
+related.py:
+    Finds related posts by comparing TF-IDF vectors of their bodies and tags.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import re
+import json
+
+import stasipy.utils as utils
+from stasipy.errors import StasipyException
+
+try:
+    import numpy as np
+    import scipy.sparse as sparse
+except ImportError:
+    np = None
+    sparse = None
+
+# Words too common to say anything about what a post is about.
+STOP_WORDS = frozenset('''
+    about after again also an and any are as at be been but by can could did do does for from had has have
+    he her his how if in into is it its just like more most my no not of on one only or our out over she so
+    some than that the their them then there these they this those to too up us was we were what when where
+    which who why will with would you your
+'''.split())
+
+_word_pattern = re.compile(r"[a-z0-9][a-z0-9'_-]+")
+
+
+class RelatedPosts(object):
+    """
+    Works out the most similar posts to every post.
+
+    Each post is turned into a sparse TF-IDF vector of the words in its body,
+        plus its tags (which count "tag_weight" times as much as a word), and
+        every post's nearest neighbours by cosine similarity are found with
+        batched sparse matrix products, rather than comparing posts one pair
+        at a time.
+
+    Term counts and neighbours are cached between builds. A post is only
+        re-read when its size or mtime change, and only posts that changed,
+        or whose neighbours could have changed because of them, get their
+        neighbours recomputed. Document frequencies are always recounted, so
+        the cached neighbours of untouched posts drift slightly as the site
+        grows; changing the settings recomputes everything.
+    """
+
+    # How many rows of the similarity matrix to work on at a time.
+    batch_size = 512
+
+    # Bumped whenever what's cached changes meaning, to throw old caches away.
+    cache_version = 3
+
+    def __init__(self, cache_path, count, tag_weight):
+        """
+        Constructor
+
+        Args:
+            cache_path (str):       Where to keep term counts and neighbours
+                                        between builds.
+            count (int):            How many related posts to find for each
+                                        post.
+            tag_weight (float):     How much a tag counts for, relative to a
+                                        word in the body.
+        """
+        if np is None:
+            raise StasipyException('Related posts require numpy and scipy. Try "pip install numpy scipy".')
+
+        self.cache_path = cache_path
+        self.index_path = os.path.join(cache_path, 'related.json')
+        self.count = int(count)
+        self.tag_weight = float(tag_weight)
+        if self.tag_weight < 0:
+            raise StasipyException('"tag_weight" for related posts can\'t be negative.')
+
+    def process(self, posts, key):
+        """
+        Find the related posts for a list of posts.
+
+        Args:
+            posts (list):       Document objects.
+            key (callable):     Gives a stable key for a post, that's the
+                                    same from one build to the next.
+
+        Returns:
+            dict:   Maps each post's key to a list of related post keys, most
+                        related first.
+        """
+        previous = self._read_index()
+        previous_entries = previous.get('posts', {})
+        settings = {'count': self.count, 'tag_weight': self.tag_weight, 'version': self.cache_version}
+        if previous.get('settings') != settings:
+            previous_entries = {}
+
+        keys = [key(p) for p in posts]
+        entries = {}
+        changed = set()
+        for post_key, post in zip(keys, posts):
+            stat = post.stat or os.stat(post.path)
+            entry = previous_entries.get(post_key)
+            if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                entry = {
+                    'mtime': stat.st_mtime,
+                    'size': stat.st_size,
+                    'terms': self._count_terms(post),
+                    'related': None,
+                }
+                changed.add(post_key)
+            entries[post_key] = entry
+
+        removed = set(previous_entries) - set(entries)
+        if changed or removed:
+            matrix = self._tfidf_matrix(keys, entries)
+            self._find_neighbours(keys, entries, matrix, self._stale_rows(keys, entries, matrix, changed, removed))
+
+        self._write_index({'settings': settings, 'posts': entries})
+
+        return {post_key: [related_key for related_key, _ in entries[post_key]['related']] for post_key in keys}
+
+    def _count_terms(self, post):
+        """
+        Count the words in a post's body, and its tags.
+
+        Returns:
+            dict:   Term to count. Tags are counted like words, and only
+                        weighted once they're in the TF-IDF matrix.
+        """
+        with open(post.path, 'r', encoding='utf-8') as f:
+            body = utils.remove_markdown_metadata(f.read()).lower()
+
+        terms = {}
+        for word in _word_pattern.findall(body):
+            if word not in STOP_WORDS:
+                terms[word] = terms.get(word, 0) + 1
+
+        for tag in set(tag.lower() for tag in utils.parse_terms(post.metadata.get('tags'))):
+            terms['tag:{0}'.format(tag)] = 1
+
+        return terms
+
+    def _stale_rows(self, keys, entries, matrix, changed, removed):
+        """
+        Work out which posts need their neighbours recomputed: changed posts,
+            posts whose neighbours changed or went away, and posts a changed
+            post might now outrank one of their neighbours for.
+
+        Returns:
+            list:   Row numbers, in the same order as keys.
+        """
+        stale = set()
+        for row, post_key in enumerate(keys):
+            related = entries[post_key]['related']
+            if related is None or any(k in changed or k in removed for k, _ in related):
+                stale.add(row)
+
+        changed_rows = [row for row, post_key in enumerate(keys) if post_key in changed]
+        if changed_rows and len(stale) < len(keys):
+            for start in range(0, len(changed_rows), self.batch_size):
+                batch = changed_rows[start:start + self.batch_size]
+                # How similar every post is to the closest changed post.
+                similarity = np.asarray((matrix[batch] @ matrix.T).max(axis=0).todense()).ravel()
+                for row, post_key in enumerate(keys):
+                    if row in stale:
+                        continue
+                    related = entries[post_key]['related']
+                    floor = related[-1][1] if len(related) >= self.count else 0.0
+                    if similarity[row] > floor:
+                        stale.add(row)
+
+        return sorted(stale)
+
+    def _find_neighbours(self, keys, entries, matrix, rows):
+        """
+        Find the nearest neighbours of the given rows, and store them in
+            their entries.
+        """
+        count = min(self.count, len(keys) - 1)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            similarity = np.asarray((matrix[batch] @ matrix.T).todense())
+            # A post is not related to itself.
+            similarity[np.arange(len(batch)), batch] = -1.0
+
+            if count > 0:
+                top = np.argpartition(-similarity, count - 1, axis=1)[:, :count]
+            else:
+                top = np.zeros((len(batch), 0), dtype=int)
+            for i, row in enumerate(batch):
+                scores = similarity[i, top[i]]
+                order = np.lexsort((top[i], -scores))
+                entries[keys[row]]['related'] = [
+                    [keys[col], round(float(score), 6)]
+                    for col, score in zip(top[i][order], scores[order]) if score > 0
+                ]
+
+    def _tfidf_matrix(self, keys, entries):
+        """
+        Build the L2 normalized TF-IDF matrix, one row per post.
+
+        Returns:
+            scipy.sparse.csr_matrix
+        """
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        data = []
+        for post_key in keys:
+            for term, term_count in entries[post_key]['terms'].items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                data.append(term_count)
+            indptr.append(len(indices))
+
+        counts = sparse.csr_matrix((np.array(data, dtype=np.float64), indices, indptr),
+                                   shape=(len(keys), len(vocabulary)))
+
+        # Smoothed IDF, and sublinear TF, so one post saying "python" fifty
+        #   times doesn't drown out everything else. Tags are weighted after
+        #   that, so any weight (even zero) scales them as expected.
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1.0 + len(keys)) / (1.0 + document_frequency)) + 1.0
+        for term, column in vocabulary.items():
+            if term.startswith('tag:'):
+                idf[column] *= self.tag_weight
+        counts.data = 1.0 + np.log(counts.data)
+        matrix = counts.multiply(idf).tocsr()
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ matrix
+
+    def _read_index(self):
+        """
+        Read what the previous build worked out.
+
+        Returns:
+            dict
+        """
+        if not utils.file_exists(self.index_path):
+            return {}
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                return {}
+
+    def _write_index(self, index):
+        """
+        Write out the cache for the next build.
+        """
+        utils.write_json_atomic(self.index_path, index, sort_keys=True)
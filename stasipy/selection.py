@@ -0,0 +1,127 @@
+"""
+selection.py:
+    Decides what a targeted build should touch.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import fnmatch
+import hashlib
+
+
+class BuildSelection(object):
+    """
+    The set of source files a build is limited to.
+
+    A file is selected if it matches any of the "only" patterns (or there
+        aren't any), it was modified at or after "since" (if given), and it
+        falls in "shard" (if given). Patterns are globs, matched against a
+        file's path relative to "src", relative to the site, its absolute
+        path, and its href. A path to a directory selects everything under
+        it.
+
+    Files are split between shards by a hash of their path relative to
+        "src", so every machine building a shard agrees on who builds what.
+    """
+
+    def __init__(self, base_site_path, source_path, only=None, since=None, shard=None):
+        """
+        Constructor
+
+        Args:
+            base_site_path (str):   Path to the site.
+            source_path (str):      Path to the site's "src" directory.
+            only (list):            Paths or globs to limit the build to.
+            since (float):          Only select files modified at or after
+                                        this timestamp.
+            shard (tuple):          (index, count) of the shard to select.
+                                        Index starts at 1.
+        """
+        self.base_site_path = base_site_path
+        self.source_path = source_path
+        self.only = list(only or [])
+        self.since = since
+        self.shard = shard
+
+        # Anything that exists on disk can be matched by its real location,
+        #   so relative paths work from wherever the command was run.
+        self._only_paths = [os.path.abspath(os.path.expanduser(p)) for p in self.only
+                            if os.path.exists(os.path.expanduser(p))]
+
+    @property
+    def targeted(self):
+        """
+        Whether this build is limited at all.
+        """
+        return bool(self.only) or self.since is not None
+
+    def matches(self, path, stat=None, href=None):
+        """
+        Check if a source file is part of the selection.
+
+        Args:
+            path (str):             Full path to the source file.
+            stat (stat_result):     The file's stat result, if we have it.
+            href (str):             Where the file ends up on the site.
+
+        Returns:
+            bool
+        """
+        if self.shard is not None and not self.in_shard(path):
+            return False
+
+        if self.since is not None:
+            mtime = (stat or os.stat(path)).st_mtime
+            if mtime < self.since:
+                return False
+
+        if not self.only:
+            return True
+
+        abspath = os.path.abspath(path)
+        for only_path in self._only_paths:
+            if abspath == only_path or abspath.startswith(only_path.rstrip(os.sep) + os.sep):
+                return True
+
+        candidates = [
+            abspath,
+            os.path.relpath(abspath, self.base_site_path).replace(os.sep, '/'),
+            os.path.relpath(abspath, self.source_path).replace(os.sep, '/'),
+        ]
+        if href is not None:
+            candidates += [href, href.lstrip('/')]
+
+        for pattern in self.only:
+            for candidate in candidates:
+                if fnmatch.fnmatch(candidate, pattern):
+                    return True
+
+        return False
+
+    def in_shard(self, path):
+        """
+        Check if a source file falls in this selection's shard.
+
+        Args:
+            path (str):     Full path to the source file.
+
+        Returns:
+            bool
+        """
+        index, count = self.shard
+        relpath = os.path.relpath(os.path.abspath(path), self.source_path).replace(os.sep, '/')
+        digest = hashlib.sha1(relpath.encode('utf-8')).hexdigest()
+        return int(digest, 16) % count == index - 1
+
+    def documents(self, documents):
+        """
+        Filter a list of documents down to the selected ones.
+
+        Args:
+            documents (list):   Document objects.
+
+        Returns:
+            list
+        """
+        return [d for d in documents if self.matches(d.path, d.stat, d.href)]
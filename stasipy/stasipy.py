@@ -5,17 +5,30 @@ stasipy.py:
 Author: Corwin Brown
 Date: 05/07/2016
 """
-from __future__ import absolute_import
-
 import os
+import json
 import yaml
 import shutil
-import pkg_resources
+import functools
+import contextlib
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
 
 import stasipy.utils as utils
+from stasipy.document_types import PageType
 from stasipy.document_types.markdown import MarkdownDocument
 from stasipy.document_types.template import TemplateDocument
 from stasipy.document_types.html import HTMLDocument
+from stasipy.manifest import BuildManifest
+from stasipy.metrics import BuildMetrics
+from stasipy.pipeline import BuildPipeline, PipelineContext
+from stasipy.output import DirectorySink, MemorySink, open_sink, sink_class_for
+from stasipy.discovery import IgnoreRules, scan_files
+from stasipy.lock import BuildLock
+from stasipy.includes import IncludeGraph, Transcluder
+from stasipy.locales import LocaleBuild, locale_of, read_locales
+from stasipy.urls import HrefIndex
+from stasipy.selection import BuildSelection
 from stasipy.errors import StasipyException
 from stasipy.defaults import StasipyDefaults
 
@@ -31,11 +44,12 @@ class Stasipy(object):
         '.md': MarkdownDocument,
         '.mdown': MarkdownDocument,
         '.j2': TemplateDocument,
-        'html': HTMLDocument,
-        'htm': HTMLDocument,
+        '.html': HTMLDocument,
+        '.htm': HTMLDocument,
     }
 
-    def __init__(self, base_site_path, site_name=None, verbose_mode=None, skip_confirm=False):
+    def __init__(self, base_site_path, site_name=None, verbose_mode=None, skip_confirm=False,
+                 manifest_path=None, output_path=None, site_model=None, metrics_path=None, pools=None):
         """
         Constructor.
 
@@ -46,6 +60,26 @@ class Stasipy(object):
             config_path (str):          Path to the site config file.
             verbose_mode (bool):        Toggle verbose mode.
             skip_confirm (bool):        Skip any confirmation dialogs.
+            manifest_path (str):        Where to write the manifest of changed
+                                            output files. Defaults to
+                                            ".stasipy/manifest.json" in the
+                                            site directory for "out", one
+                                            in ".stasipy/manifests" for any
+                                            other directory, or next to the
+                                            archive for archive output.
+            output_path (str):          Where to write the site. Defaults to
+                                            "out" in the site directory. See
+                                            "output.open_sink".
+            site_model (SiteModel):     Parsed config and documents kept
+                                            from earlier builds of the site,
+                                            to reuse whatever hasn't changed.
+            metrics_path (str):         Where to write build metrics, in
+                                            Prometheus' text format. None
+                                            to not write any.
+            pools (WorkerPools):        Worker pools shared with other
+                                            builds in this process. By
+                                            default every build starts its
+                                            own.
         """
 
         self.base_site_path = os.path.expanduser(base_site_path)
@@ -57,28 +91,40 @@ class Stasipy(object):
         self.source_meta_path = os.path.join(self.source_path, 'meta')
         self.source_static_path = os.path.join(self.source_path, 'static')
 
-        # Staging Paths.
-        self.staging_path = os.path.join(self.base_site_path, '.out.staging')
-        self.staging_posts_path = os.path.join(self.staging_path, 'post')
-        self.staging_pages_path = os.path.join(self.staging_path, 'page')
-        self.staging_static_path = os.path.join(self.staging_path, 'static')
-        self.staging_meta_path = self.staging_path
-
         # Output Paths.
-        self.out_path = os.path.join(self.base_site_path, 'out')
+        self.out_path = os.path.expanduser(output_path) if output_path else os.path.join(self.base_site_path, 'out')
+        self.sink = None
+
+        # Build state that should survive between runs. Every output
+        #   directory and archive gets its own manifest, so a build never
+        #   vouches for what's in a different one.
+        self.cache_path = os.path.join(self.base_site_path, '.stasipy')
+        sink_class = sink_class_for(self.out_path)
+        if manifest_path is not None:
+            self.manifest_path = manifest_path
+        elif sink_class is DirectorySink:
+            self.manifest_path = self._directory_manifest_path(self.out_path)
+        elif sink_class is MemorySink:
+            self.manifest_path = None
+        else:
+            self.manifest_path = '{0}.manifest.json'.format(self.out_path)
 
         self.templates_path = os.path.join(self.source_path, 'templates')
         self.site_name = site_name or self._site_name_from_path(self.base_site_path)
         self.verbose_mode = True if verbose_mode else False
         self.skip_confirm = skip_confirm
+        self.site_model = site_model
+        self.pools = pools
         self.site_vars = self._read_site_config()
+        self.ignore_rules = IgnoreRules.from_file(os.path.join(self.base_site_path, IgnoreRules.filename))
 
-    def __del__(self):
-        """
-        Destructor.
-        """
-
-        self._clean()
+        # Build metrics.
+        self.metrics_path = metrics_path
+        self.metrics = BuildMetrics(self.site_name)
+        self.pipeline = BuildPipeline(self.site_vars, self.metrics)
+        self.context = PipelineContext(self.site_vars, self.source_path)
+        self.markdown_cache = None
+        self.document_counts = {}
 
     def _site_name_from_path(self, path):
         """
@@ -101,6 +147,24 @@ class Stasipy(object):
                 return part
         return None
 
+    def _directory_manifest_path(self, out_path):
+        """
+        Work out where the manifest for an output directory lives. The
+            site's own "out" keeps ".stasipy/manifest.json". Any other
+            directory gets a manifest named for its resolved path.
+
+        Args:
+            out_path (str):     The output directory.
+
+        Returns:
+            str
+        """
+        out_path = os.path.realpath(out_path)
+        if out_path == os.path.realpath(os.path.join(self.base_site_path, 'out')):
+            return os.path.join(self.cache_path, 'manifest.json')
+
+        return os.path.join(self.cache_path, 'manifests', '{0}.json'.format(utils.hash_content(out_path)[:16]))
+
     def init(self, maintainer=None, maintainer_email=None):
         """
         Intialize a Base Site.
@@ -117,6 +181,10 @@ class Stasipy(object):
             else:
                 return
 
+        # pkg_resources scans every installed distribution when it's imported,
+        #   so only pay for that when we actually need it.
+        import pkg_resources
+
         self._verbose('Copying template site to: {0}'.format(self.base_site_path))
         template_site_path = pkg_resources.resource_filename(__name__, self.template_site_name)
         shutil.copytree(template_site_path, self.base_site_path)
@@ -125,19 +193,297 @@ class Stasipy(object):
         self._generate_base_site_config(maintainer=maintainer,
                                         maintainer_email=maintainer_email)
 
-    def generate(self):
+    def generate(self, only=None, since=None, shard=None):
         """
         Generate a new site from source.
+
+        Targeted builds (when "only" or "since" are given) still read the
+            metadata of every document, so navigation is complete, but only
+            render and write out the documents and static files that were
+            asked for. Nothing else in the output directory is touched.
+
+        Sharded builds render their slice of the posts and pages into
+            ".stasipy/shards/<index>-of-<count>", along with a fragment
+            describing what was rendered. Meta pages and static files are
+            left for "merge".
+
+        Args:
+            only (list):        Paths or globs to limit the build to.
+            since (float):      Only build files modified at or after this
+                                    timestamp.
+            shard (tuple):      (index, count) of the shard to build. Index
+                                    starts at 1.
+        """
+        status = 1
+        try:
+            with self._locked():
+                status = self._generate(only=only, since=since, shard=shard)
+        finally:
+            self._write_metrics(success=not status)
+
+        return status
+
+    def _generate(self, only=None, since=None, shard=None):
+        """
+        Does the work for "generate", with the site locked.
+        """
+        selection = BuildSelection(self.base_site_path, self.source_path, only=only, since=since, shard=shard)
+
+        site = self._load_site()
+        if site is None:
+            return 1
+        static_files, image_variants, bundle_files, posts, pages, meta_pages = site
+        documents = posts + pages + meta_pages + list(self.translations.values())
+
+        static_copies = []
+        if selection.shard is None:
+            for static_file in static_files:
+                if selection.matches(static_file.path, static_file.stat):
+                    static_copies.append((static_file.relpath, static_file.path))
+                    static_copies += image_variants.get(static_file.relpath, [])
+        elif len(self.locales) > 1:
+            raise StasipyException('Sharded builds of sites with locales are not supported.')
+
+        # Work out what we're actually building.
+        selected = selection.documents(documents)
+        if selection.targeted:
+            # Anything that includes a selected document has to be rebuilt
+            #   along with it.
+            dependents = self.include_graph.dependents(self._source_relpath(d) for d in selected)
+            selected_set = set(selected)
+            selected += [d for d in documents if d not in selected_set and self._source_relpath(d) in dependents]
+            if not selected and not static_copies:
+                utils.print_err('Nothing matched the targeted build!')
+                return 1
+            self._verbose('Targeted build: {0} of {1} documents, {2} static files.'.format(
+                len(selected), len(documents), len(static_copies)))
+        if selection.shard is None:
+            # Bundles are cheap to copy when they haven't changed, and are
+            #   named for their inputs, so they go along with anything else
+            #   that gets built. They don't count as matching, though.
+            static_copies += bundle_files
+        if selection.shard is not None:
+            # Meta pages need every post, so they wait for the merge.
+            selected = [d for d in selected if d.type != PageType.meta]
+            self._verbose('Shard {0} of {1}: {2} of {3} documents.'.format(
+                selection.shard[0], selection.shard[1], len(selected), len(documents)))
+
+        builds = [self._plan_locale(locale, posts, pages, meta_pages, set(selected)) for locale in self.locales]
+
+        workers = self.site_vars.get('output_workers', StasipyDefaults.output_workers)
+        if selection.shard is not None:
+            # Shards are always written to a directory, for "merge" to
+            #   pick up.
+            shard_path = self._shard_path(*selection.shard)
+            self.sink = DirectorySink(
+                out_path=os.path.join(shard_path, 'out'),
+                manifest=BuildManifest(os.path.join(shard_path, 'manifest.json')),
+                workers=workers,
+                pool=self._thread_pool(workers),
+            )
+        else:
+            self.sink = open_sink(self.out_path, BuildManifest(self.manifest_path), workers,
+                                  partial=selection.targeted, pool=self._thread_pool(workers))
+        self._write_site(self.sink, builds, static_copies)
+
+        if selection.shard is not None:
+            self._write_shard_fragment(selection.shard, self.sink.manifest, builds[0].posts)
+        else:
+            self._write_include_graph(builds, documents)
+
+    def merge(self, shard_count):
+        """
+        Assemble "out" from a sharded build. The rendered posts and pages
+            are copied in from every shard, and meta pages are rendered from
+            the posts the shards recorded in their fragments.
+
+        Args:
+            shard_count (int):  How many shards the build was split into.
+        """
+        status = 1
+        try:
+            with self._locked():
+                status = self._merge(shard_count)
+        finally:
+            self._write_metrics(success=not status)
+
+        return status
+
+    def _merge(self, shard_count):
+        """
+        Does the work for "merge", with the site locked.
+        """
+        fragments = self._read_shard_fragments(shard_count)
+
+        site = self._load_site()
+        if site is None:
+            return 1
+        static_files, image_variants, bundle_files, posts, pages, meta_pages = site
+        if len(self.locales) > 1:
+            raise StasipyException('Sharded builds of sites with locales are not supported.')
+
+        static_copies = []
+        for static_file in static_files:
+            static_copies.append((static_file.relpath, static_file.path))
+            static_copies += image_variants.get(static_file.relpath, [])
+        static_copies += bundle_files
+
+        shard_copies = []
+        rendered_posts = {}
+        for index, fragment in enumerate(fragments, start=1):
+            shard_out_path = os.path.join(self._shard_path(index, shard_count), 'out')
+            shard_copies += [(relpath, os.path.join(shard_out_path, relpath)) for relpath in fragment['files']]
+            rendered_posts.update(fragment['posts'])
+
+        # Only meta pages get rendered. Posts take their summary and content
+        #   from whichever shard rendered them.
+        build = self._plan_locale(self.locales[0], posts, pages, meta_pages, set(meta_pages))
+        for post in build.all_posts:
+            rendered = rendered_posts.get(self._source_relpath(post))
+            if rendered is None:
+                raise StasipyException('No shard rendered "{0}". Were the shards built from the same source?'
+                                       .format(post.path))
+            post.summary = rendered['summary']
+            post.content = rendered['content']
+
+        workers = self.site_vars.get('output_workers', StasipyDefaults.output_workers)
+        self.sink = open_sink(
+            self.out_path,
+            BuildManifest(self.manifest_path),
+            workers,
+            pool=self._thread_pool(workers),
+        )
+        build = build._replace(to_prepare=build.meta_pages)
+        self._write_site(self.sink, [build], shard_copies + static_copies)
+        self._write_include_graph([build], posts + pages + meta_pages + list(self.translations.values()))
+
+    def _write_include_graph(self, builds, documents):
+        """
+        Save who includes what, for the next targeted build. Sharded builds
+            leave it alone, since shards run side by side.
+
+        Args:
+            builds (list):      The LocaleBuild objects that were rendered.
+            documents (list):   Every document on the site.
+        """
+        rendered = set(self._source_relpath(d) for build in builds for d in build.to_prepare)
+        self.include_graph.write(rendered, [self._source_relpath(d) for d in documents])
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """
+        Hold the build locks, timing how long it took to get them. The site
+            is checked first, so a site that doesn't exist never gets a
+            ".stasipy" directory.
+        """
+        if not utils.file_exists(self.source_path):
+            raise StasipyException('Source path does not exists at: "{0}"'.format(self.source_path))
+
+        locks = self._build_locks()
+        with contextlib.ExitStack() as stack:
+            with self.metrics.phase('lock_wait'):
+                for lock in locks:
+                    stack.enter_context(lock)
+            yield
+
+    def _write_metrics(self, success):
+        """
+        Write out build metrics, if asked to.
+
+        Args:
+            success (bool):     Whether the build succeeded.
+        """
+        if self.metrics_path is None:
+            return
+
+        caches = {}
+        if self.markdown_cache is not None:
+            caches['markdown'] = (self.markdown_cache.hits, self.markdown_cache.misses)
+        if self.site_model is not None:
+            caches['documents'] = (self.site_model.reused, self.site_model.loaded)
+
+        self.metrics.finish(success, sink=self.sink, caches=caches, documents=self.document_counts)
+        self.metrics.write(self.metrics_path)
+
+    def _build_locks(self):
+        """
+        The locks that keep builds from overlapping, in the order to take
+            them. Another build of the same site waits for the first, for up
+            to "lock_timeout" seconds (forever, by default).
+
+        A build that writes somewhere other than the site's own "out" also
+            locks its output, with a lock file next to it, so builds of
+            different sites into the same place wait for each other too.
+
+        Returns:
+            list:   BuildLock objects.
+        """
+        timeout = self.site_vars.get('lock_timeout', StasipyDefaults.lock_timeout)
+        locks = [BuildLock(path=os.path.join(self.cache_path, 'build.lock'), timeout=timeout)]
+
+        out_path = os.path.realpath(self.out_path)
+        if (sink_class_for(self.out_path) is not MemorySink
+                and out_path != os.path.realpath(os.path.join(self.base_site_path, 'out'))):
+            parent, name = os.path.split(out_path)
+            locks.append(BuildLock(path=os.path.join(parent, '.{0}.stasipy.lock'.format(name)), timeout=timeout))
+
+        return locks
+
+    def _load_site(self):
+        """
+        Everything every kind of build needs before it can render: static
+            files (and their image variants and bundles), every document's
+            metadata, related posts, and compiled templates.
+
+        On sites with locales, translations are set aside in
+            "self.translations", keyed by (locale, type, relative_path), and
+            only the default locale's documents are returned.
+
+        Returns:
+            tuple:  (static_files, image_variants, bundle_files, posts, pages,
+                        meta_pages), or None if there are no documents.
         """
         # Ensure the source path exists.
         if not utils.file_exists(self.source_path):
             raise StasipyException('Source path does not exists at: "{0}"'.format(self.source_path))
 
+        self.markdown_cache = self._configure_markdown_cache()
+        self.include_graph = IncludeGraph(os.path.join(self.cache_path, 'includes.json'), self.source_path)
+        self.locales = read_locales(self.site_vars)
+        self.translations = {}
+
+        # Find static files, and generate any image variants and bundles
+        #   before reading documents, so documents can use "image()" and
+        #   "bundle()".
+        self._load_plugins()
+
+        with self.pipeline.stage('discover'):
+            static_files = list(scan_files(
+                root=self.source_path,
+                path=os.path.relpath(self.source_static_path, self.source_path),
+                ignore_rules=self.ignore_rules,
+            ))
+        with self.pipeline.stage('static'):
+            image_variants = self._process_images(static_files)
+            static_files, bundle_files = self._process_bundles(static_files)
+
         # Find our posts, pages, and meta pages.
         self._verbose('Discovering documents.')
-        posts = self._discover_documents(self.source_posts_path, 'post')
-        pages = self._discover_documents(self.source_pages_path, 'page')
-        meta_pages = self._discover_documents(self.source_meta_path, 'meta')
+        with self.pipeline.stage('discover'):
+            if self.site_model is not None:
+                self.site_model.begin_discovery()
+            posts = self._set_aside_translations(self._discover_documents(self.source_posts_path, 'post'))
+            pages = self._set_aside_translations(self._discover_documents(self.source_pages_path, 'page'))
+            meta_pages = self._set_aside_translations(self._discover_documents(self.source_meta_path, 'meta'))
+            if self.site_model is not None:
+                self.site_model.end_discovery()
+                self._verbose('Reused {0} documents, read {1}.'.format(
+                    self.site_model.reused, self.site_model.loaded))
+        self.document_counts = {
+            PageType.post: len(posts),
+            PageType.page: len(pages),
+            PageType.meta: len(meta_pages),
+        }
         if posts or pages or meta_pages:
             self._verbose(
                 'Discovered documents!\nPosts:\n  - {0}\nPages: \n  - {1}\nMeta Pages: \n  - {2}'.format(
@@ -147,48 +493,414 @@ class Stasipy(object):
             )
         else:
             utils.print_err('No documents found!')
-            return 1
+            return None
+
+        self.context.static_files = static_files
+        self.context.posts = posts
+        self.context.pages = pages
+        self.context.meta_pages = meta_pages
+        self.pipeline.run('discover', self.context)
+
+        with self.pipeline.stage('parse'):
+            self._relate_posts(posts)
+
+            # Compiled templates are kept in ".stasipy", so only templates
+            #   that changed since the last build need compiling.
+            compiled = utils.compile_templates(self.templates_path, os.path.join(self.cache_path, 'templates'))
+        self._verbose('Loaded {0} templates.'.format(compiled))
+
+        return static_files, image_variants, bundle_files, posts, pages, meta_pages
+
+    def _set_aside_translations(self, documents):
+        """
+        Pull the translations out of a list of documents, into
+            "self.translations".
+
+        Args:
+            documents (list):   Documents of a single type.
+
+        Returns:
+            list:   The default locale's documents.
+        """
+        default_code = self.locales[0].code
+        originals = []
+        for doc in documents:
+            if doc.locale == default_code:
+                originals.append(doc)
+            else:
+                self.translations[(doc.locale, doc.type, doc.relative_path)] = doc
+
+        return originals
+
+    def _plan_locale(self, locale, posts, pages, meta_pages, selected):
+        """
+        Work out what to render for a locale. Every document is swapped for
+            its translation, if it has one, and localized. Navigation and
+            links for the locale are set up from the localized documents.
+
+        Args:
+            locale (Locale):        The locale to plan for.
+            posts (list):           The default locale's posts.
+            pages (list):           The default locale's pages.
+            meta_pages (list):      The default locale's meta pages.
+            selected (set):         The documents (or translations) that
+                                        are being built.
 
-        # Set pages variable in site_vars.
-        self.site_vars['navbar'] = self._generate_navbar(pages, meta_pages)
+        Returns:
+            LocaleBuild
+        """
+        from stasipy.extensions import FragmentCacheExtension
+
+        localized = {}
+        chosen = {}
+        for doc in posts + pages + meta_pages:
+            source = self.translations.get((locale.code, doc.type, doc.relative_path), doc)
+            localized[doc] = source.localize(locale)
+            chosen[doc] = source in selected
+
+        # Related posts link to posts in the same locale.
+        posts_by_vars = dict((id(p.__dict__), p) for p in posts)
+        for post in posts:
+            localized[post].related = [localized[posts_by_vars[id(r)]].__dict__ for r in post.related]
+
+        locale.build_vars['navbar'] = self._generate_navbar(
+            locale.site_vars, [localized[d] for d in pages], [localized[d] for d in meta_pages])
+        index = HrefIndex(list(localized.values()), self.source_path)
+        locale.build_vars['url_for'] = index
+        locale.build_vars['include_doc'] = Transcluder(index, self.include_graph).template_function()
+        locale.build_vars['locales'] = [l.code for l in self.locales]
+
+        # Regions wrapped in "{% cache %}" are rendered once per build.
+        locale.build_vars[FragmentCacheExtension.context_variable] = {}
+
+        build_posts = [localized[d] for d in posts if chosen[d]]
+        build_pages = [localized[d] for d in pages if chosen[d]]
+        build_meta_pages = [localized[d] for d in meta_pages if chosen[d]]
+
+        # Meta pages list every post, so rendering one means every post
+        #   needs its summary.
+        to_prepare = build_posts + build_pages + build_meta_pages
+        if build_meta_pages:
+            to_prepare += [localized[d] for d in posts if not chosen[d]]
+
+        return LocaleBuild(
+            locale=locale,
+            posts=build_posts,
+            pages=build_pages,
+            meta_pages=build_meta_pages,
+            all_posts=[localized[d] for d in posts],
+            to_prepare=to_prepare,
+        )
 
-        # Keep this separate, because only meta pages need this info.
-        posts_list = self._get_posts_list(posts)
+    def _write_site(self, sink, builds, copies):
+        """
+        Render and write out every locale's documents, copy in files as is,
+            and finalize the site. Each locale gets its own render thread
+            (see "_for_each_locale"). If anything goes wrong, the manifest
+            is still written, so it matches what actually made it into the
+            output directory.
 
-        # Generate the "out" staging directory.
+        Args:
+            sink (OutputSink):      The sink to write to.
+            builds (list):          LocaleBuild objects to render.
+            copies (list):          (relpath, path) tuples of files to copy.
+        """
+        relpaths = []
+        for build in builds:
+            relpaths += [build.locale.output_path(os.path.join('post', '{0}.html'.format(p.relative_path)))
+                         for p in build.posts]
+            relpaths += [build.locale.output_path(os.path.join('page', '{0}.html'.format(p.relative_path)))
+                         for p in build.pages]
+            relpaths += [build.locale.output_path('{0}.html'.format(p.relative_path)) for p in build.meta_pages]
+        sink.prepare_directories(relpaths + [relpath for relpath, _ in copies])
+
+        self.context.builds = builds
+        self.context.sink = sink
         try:
-            self._create_staging_out_dir()
-        except ValueError as e:
-            utils.print_err('Error: {0}'.format(e))
-            return 1
+            # Render out every document's summary and content, then render
+            #   and write the posts/pages/meta pages. Writing happens while
+            #   the sink works through its queue.
+            self._for_each_locale(self._prepare_locale, builds)
+            self.pipeline.run('parse', self.context)
+
+            self._verbose('Writing out documents.')
+            self._for_each_locale(functools.partial(self._write_locale, sink), builds)
+            self.pipeline.run('render', self.context)
+            self.pipeline.run('post_process', self.context)
+            self.pipeline.run('write', self.context)
+
+            # Copy over static (and already rendered) files.
+            with self.pipeline.stage('static'):
+                for relpath, fpath in copies:
+                    sink.copy(relpath, fpath)
+            self.pipeline.run('static', self.context)
+
+            # Finalize the site. Hooks go first, so they can still write.
+            #   Most of the writing really happens while the sink drains, so
+            #   that counts towards "write".
+            self.pipeline.run('finalize', self.context)
+            with self.pipeline.stage('write'):
+                sink.close()
+            with self.pipeline.stage('finalize'):
+                self._finalize_site(sink)
+        except BaseException:
+            sink.abort()
+            sink.manifest.write()
+            raise
+
+        self._verbose(self.pipeline.report())
+
+    def _for_each_locale(self, func, builds):
+        """
+        Call a function for each locale's build, on a thread per locale if
+            there's more than one.
+
+        Rendering Jinja and Markdown is CPU bound and holds the GIL, so the
+            threads mostly overlap file reads, Markdown cache lookups and
+            handing output to the sink, not the rendering itself. Documents,
+            templates and the sink are shared between locales, which is what
+            keeps this on threads rather than processes.
+
+        Args:
+            func (callable):    Takes a LocaleBuild.
+            builds (list):      LocaleBuild objects.
+        """
+        if len(builds) == 1:
+            func(builds[0])
+            return
+
+        with ThreadPoolExecutor(max_workers=len(builds)) as executor:
+            for future in [executor.submit(func, build) for build in builds]:
+                future.result()
+
+    def _prepare_locale(self, build):
+        """
+        Render out the summary and content of a locale's documents, and run
+            them through any "parse" hooks.
+
+        Args:
+            build (LocaleBuild):    What to prepare.
+        """
+        for doc in build.to_prepare:
+            with self.pipeline.stage('parse'):
+                doc.prepare()
+            self.pipeline.parse(doc, self.context)
+
+    def _write_locale(self, sink, build):
+        """
+        Render out a locale's documents, and hand them to the sink.
+
+        Args:
+            sink (OutputSink):      The sink to write to.
+            build (LocaleBuild):    What to render.
+        """
+        if build.locale.code is not None:
+            self._verbose('Rendering locale: {0}'.format(build.locale.code))
+
+        site_vars = build.locale.site_vars
+        posts_list = self._get_posts_list(build.all_posts)
+        self._write_documents(sink, self._render_documents(build.posts, site_vars),
+                              build.locale.output_path('post'))
+        self._write_documents(sink, self._render_documents(build.pages, site_vars),
+                              build.locale.output_path('page'))
+        self._write_documents(sink, self._render_documents(build.meta_pages, site_vars, posts=posts_list),
+                              build.locale.output_path(''))
+
+    def _shard_path(self, index, count):
+        """
+        Where a shard of a sharded build is written.
+        """
+        return os.path.join(self.cache_path, 'shards', '{0}-of-{1}'.format(index, count))
+
+    def _source_relpath(self, document):
+        """
+        A document's path relative to "src", which is how shards refer to it.
+        """
+        return os.path.relpath(document.path, self.source_path).replace(os.sep, '/')
+
+    def _write_shard_fragment(self, shard, manifest, posts):
+        """
+        Record what a shard rendered, for "merge" to pick up.
+
+        Args:
+            shard (tuple):              (index, count) of the shard.
+            manifest (BuildManifest):   The shard's manifest.
+            posts (list):               The posts the shard rendered.
+        """
+        fragment = {
+            'shard': shard[0],
+            'shards': shard[1],
+            'files': sorted(manifest.hashes),
+            'posts': {
+                self._source_relpath(p): {'summary': p.summary, 'content': p.content} for p in posts
+            },
+        }
+        utils.write_json_atomic(os.path.join(self._shard_path(*shard), 'fragment.json'), fragment, sort_keys=True)
+
+    def _read_shard_fragments(self, shard_count):
+        """
+        Read the fragment from every shard of a sharded build.
 
-        # Write the rendered posts/pages/meta pages.
-        self._verbose('Writing out documents.')
+        Args:
+            shard_count (int):  How many shards the build was split into.
+
+        Returns:
+            list:   Fragments, in shard order.
+        """
+        fragments = []
+        for index in range(1, shard_count + 1):
+            fragment_path = os.path.join(self._shard_path(index, shard_count), 'fragment.json')
+            if not utils.file_exists(fragment_path):
+                raise StasipyException('Shard {0} of {1} has not been built! Expected a fragment at: "{2}"'
+                                       .format(index, shard_count, fragment_path))
+            with open(fragment_path, 'r', encoding='utf-8') as f:
+                fragments.append(json.load(f))
+
+        return fragments
+
+    def _process_images(self, static_files):
+        """
+        Generate resized variants of the images in "static", if the site
+            config asks for them, and expose them to templates through an
+            "image" function:
+
+            {{ image('/static/img/photo.jpg').tag(alt='A photo') }}
 
-        # Write out posts.
-        self._write_documents(
-            self._render_documents(posts),
-            self.staging_posts_path
+        Args:
+            static_files (list):    DiscoveredFile objects for everything
+                                        in "static".
+
+        Returns:
+            dict:   Maps the relpath of each image to a list of (relpath,
+                        path) tuples of variants to copy into the output
+                        directory.
+        """
+        image_config = self.site_vars.get('images')
+        if not image_config:
+            return {}
+
+        from stasipy.images import ImagePipeline
+
+        self._verbose('Processing images.')
+        pipeline = ImagePipeline(
+            cache_path=os.path.join(self.cache_path, 'images'),
+            widths=image_config.get('widths', StasipyDefaults.image_widths),
+            quality=image_config.get('quality', StasipyDefaults.image_quality),
+            workers=image_config.get('workers'),
+            pool=self.pools.processes(image_config.get('workers')) if self.pools is not None else None,
         )
+        images, variant_files = pipeline.process(static_files)
+
+        def image(src):
+            href = '/{0}'.format(src.lstrip('/'))
+            if href not in images:
+                raise StasipyException('No image found in "static" at: "{0}"'.format(src))
+            return images[href]
+
+        self.site_vars['image'] = image
+        return variant_files
 
-        # Write out pages.
-        self._write_documents(
-            self._render_documents(pages),
-            self.staging_pages_path
+    def _thread_pool(self, workers):
+        """
+        Get the shared pool of writer threads, if there is one.
+
+        Args:
+            workers (int):      How many threads the site wants.
+
+        Returns:
+            ThreadPool, or None for the sink to start its own.
+        """
+        return self.pools.threads(workers) if self.pools is not None else None
+
+    def _process_bundles(self, static_files):
+        """
+        Build the CSS and JavaScript bundles declared under "bundles" in the
+            site config, or in "static/bundles.yml", and expose them to
+            templates through a "bundle" function:
+
+            {{ bundle('site.css') }}
+
+        Args:
+            static_files (list):    DiscoveredFile objects for everything
+                                        in "static".
+
+        Returns:
+            tuple:  (static_files, bundle_files), where static_files no
+                        longer has "bundles.yml" in it, and bundle_files is
+                        a list of (relpath, path) tuples of bundles to copy
+                        into the output directory.
+        """
+        from stasipy.bundles import MANIFEST_NAME
+
+        bundle_config = self.site_vars.get('bundles')
+        manifest_relpath = 'static/{0}'.format(MANIFEST_NAME)
+        manifest = [f for f in static_files if f.relpath == manifest_relpath]
+        if manifest:
+            static_files = [f for f in static_files if f.relpath != manifest_relpath]
+            if not bundle_config:
+                with open(manifest[0].path, 'r', encoding='utf-8') as f:
+                    bundle_config = yaml.safe_load(f.read()) or {}
+        if not bundle_config:
+            return static_files, []
+
+        from stasipy.bundles import BundlePipeline
+
+        self._verbose('Building bundles.')
+        pipeline = BundlePipeline(
+            cache_path=os.path.join(self.cache_path, 'bundles'),
+            bundles=bundle_config,
+            minify=self.site_vars.get('bundle_minify', StasipyDefaults.bundle_minify),
         )
+        bundles, bundle_files = pipeline.process(static_files)
+
+        def bundle(name):
+            if name not in bundles:
+                raise StasipyException('No bundle named "{0}". Bundles are: {1}'.format(
+                    name, ', '.join(sorted(bundles))))
+            return bundles[name]
+
+        self.site_vars['bundle'] = bundle
+        return static_files, bundle_files
+
+    def _relate_posts(self, posts):
+        """
+        Work out related posts, if the site config asks for them, and hand
+            each post its list as "document.related".
 
-        # Write out meta pages.
-        self._write_documents(
-            self._render_documents(meta_pages, posts=posts_list),
-            self.staging_meta_path
+        Args:
+            posts (list):   Every post on the site.
+        """
+        related_config = self.site_vars.get('related_posts')
+        if not related_config or not posts:
+            return
+        if not isinstance(related_config, dict):
+            related_config = {}
+
+        from stasipy.related import RelatedPosts
+
+        self._verbose('Finding related posts.')
+        related_posts = RelatedPosts(
+            cache_path=self.cache_path,
+            count=related_config.get('count', StasipyDefaults.related_posts_count),
+            tag_weight=related_config.get('tag_weight', StasipyDefaults.related_posts_tag_weight),
         )
+        related = related_posts.process(posts, key=self._source_relpath)
 
-        # Copy over static files.
-        if utils.file_exists(self.source_static_path):
-            shutil.copytree(self.source_static_path, self.staging_static_path)
+        posts_by_key = {self._source_relpath(p): p for p in posts}
+        for post in posts:
+            post.related = [posts_by_key[k].__dict__ for k in related[self._source_relpath(post)]]
 
-        # Finalize the site.
-        self._finalize_site()
+    def _load_plugins(self):
+        """
+        Register the built in plugins the site config turns on, then any
+            plugins it lists. Plugins can live in the site directory.
+        """
+        # "json_api: {}" (or an empty section) means the defaults.
+        if 'json_api' in self.site_vars and self.site_vars['json_api'] is not False:
+            from stasipy.api import register as register_json_api
+            register_json_api(self.pipeline)
+
+        self.pipeline.load_plugins(search_path=self.base_site_path)
 
     def _generate_base_site_config(self, **kwargs):
         """
@@ -204,48 +916,50 @@ class Stasipy(object):
         config_data['site_name'] = self.site_name
         config_data.update(kwargs)
         config_path = os.path.join(self.base_site_path, 'siteconfig.yml')
-        with open(config_path, 'w') as f:
+        with open(config_path, 'w', encoding='utf-8') as f:
             f.write('---\n')
             f.write(yaml.dump(config_data, default_flow_style=False))
 
-    def _finalize_site(self):
-        """
-        Copy staging over to production.
+    def _finalize_site(self, sink):
         """
-        if not os.path.exists(self.staging_path):
-            raise ValueError('Staging path does not exist at: "{0}"'.format(self.staging_path))
+        Write out a manifest of what changed, once the sink is closed.
 
-        # If our 'out' path exists, remove it, so we can create a new one.
-        if os.path.exists(self.out_path):
-            shutil.rmtree(self.out_path)
+        Args:
+            sink (OutputSink):      The sink the site was written to.
+        """
+        sink.manifest.write()
+        self._verbose('Finalized site: {0}'.format(sink.manifest.summary()))
 
-        # Copy over our "staging" site.
-        shutil.copytree(self.staging_path, self.out_path)
+        if self.markdown_cache is not None:
+            evicted = self.markdown_cache.prune()
+            self._verbose('Markdown cache: {0} hits, {1} misses, {2} evicted.'.format(
+                self.markdown_cache.hits, self.markdown_cache.misses, evicted))
 
-    def _create_staging_out_dir(self):
+    def _configure_markdown_cache(self):
         """
-        Create a staging out directory, so we can generate all of our content
-            with minimal interupption of the site.
-
-        Args:
-            output_staging_path (str):      The path to create the staging dir.
+        Set up the on disk cache of Markdown conversions. It lives in
+            ".stasipy/markdown", unless the STASIPY_MARKDOWN_CACHE environment
+            variable or siteconfig.yml point somewhere else (like a directory
+            shared between sites or CI runners). Setting "markdown_cache" to
+            false turns it off.
 
-        Raises:
-            ValueError when staging directory already exists, and 'n' is
-                selected at the overwrite prompt.
+        Returns:
+            MarkdownCache, or None if caching is off.
         """
-        if utils.file_exists(self.staging_path):
-            delete_old_staging = self._confirm_dialog(
-                'Staging directory already exists at "{0}"! Overwrite?'.format(self.staging_path),
-                default='n',
-            )
-            if delete_old_staging:
-                shutil.rmtree(self.staging_path)
-            else:
-                raise ValueError('Staging directory "{0}" already exists!')
-        utils.ensure_directory_exists(self.staging_path)
-        utils.ensure_directory_exists(self.staging_posts_path)
-        utils.ensure_directory_exists(self.staging_pages_path)
+        cache_config = self.site_vars.get('markdown_cache', True)
+        if cache_config is False:
+            return utils.configure_markdown_cache(None, 0)
+        if not isinstance(cache_config, dict):
+            cache_config = {}
+
+        cache_path = os.environ.get(StasipyDefaults.markdown_cache_env) or cache_config.get('path')
+        if cache_path:
+            cache_path = os.path.join(self.base_site_path, os.path.expanduser(cache_path))
+        else:
+            cache_path = os.path.join(self.cache_path, 'markdown')
+
+        max_size_mb = cache_config.get('max_size_mb', StasipyDefaults.markdown_cache_size_mb)
+        return utils.configure_markdown_cache(cache_path, int(max_size_mb * 1024 * 1024))
 
     def _read_site_config(self):
         """
@@ -255,40 +969,58 @@ class Stasipy(object):
         Returns:
             dict
         """
-        site_config_data = {}
         site_config_path = os.path.join(self.base_site_path, 'siteconfig.yml')
-        if utils.file_exists(site_config_path):
-            with open(site_config_path, 'r') as f:
-                site_config_data = yaml.load(f.read())
 
-        print site_config_data
-        return site_config_data
+        def load():
+            site_config_data = {}
+            if utils.file_exists(site_config_path):
+                with open(site_config_path, 'r', encoding='utf-8') as f:
+                    site_config_data = yaml.safe_load(f.read()) or {}
+            return site_config_data
 
-    def _render_documents(self, documents, **kwargs):
+        if self.site_model is not None:
+            return self.site_model.site_config(site_config_path, load)
+
+        return load()
+
+    def _render_documents(self, documents, site_vars=None, **kwargs):
         """
-        Render the documents, and return them in a meaningful datastructure.
+        Generator that renders documents one at a time, so each one can be
+            handed off to be written while the next is rendered.
 
         Args:
             documents (list):   list of document objects to render.
+            site_vars (dict):   The site variables to render with. Defaults
+                                    to the site's own.
+            kwargs (dict):      Section wide variables, shared by every
+                                    document being rendered.
 
         Returns:
-            dict
+            tuple:              (document, content)
         """
-        render_vars = {}
-        render_vars.update(kwargs)
-        render_vars.update(self.site_vars)
+        render_vars = ChainMap(self.site_vars if site_vars is None else site_vars, kwargs)
         if not isinstance(documents, list):
             documents = [documents]
-        return {d.name: d.render(self.templates_path, **render_vars) for d in documents}
+        for d in documents:
+            with self.pipeline.stage('render'):
+                content = d.render(self.templates_path, render_vars)
+            yield d, content
 
-    def _write_documents(self, rendered_documents, output_path):
+    def _write_documents(self, sink, rendered_documents, output_dir):
         """
-        Write out a rendered document.
+        Run rendered documents through any "post_process" hooks, and hand
+            them off to be written out.
+
+        Args:
+            sink (OutputSink):              The sink to write to.
+            rendered_documents (iterable):  (document, content) tuples.
+            output_dir (str):               The directory to write to,
+                                                relative to the output path.
         """
-        for name, content in rendered_documents.items():
-            document_output_path = os.path.join(output_path, '{0}.html'.format(name))
-            with open(document_output_path, 'w') as f:
-                f.write(content)
+        for doc, content in rendered_documents:
+            content = self.pipeline.post_process(doc, content, self.context)
+            with self.pipeline.stage('write'):
+                sink.write(os.path.join(output_dir, '{0}.html'.format(doc.relative_path)), content)
 
     def _discover_documents(self, path_to_search, document_type):
         """
@@ -298,33 +1030,52 @@ class Stasipy(object):
             path_to_search (str):       The root directory to search in.
             document_type (str):        The type of document I'm searching for.
         """
-        # Find Markdown files and create a Document object.
         documents = []
-        for fpath in utils.list_files(path_to_search):
-            fname, fext = os.path.splitext(fpath)
-            if fext not in self.document_type_mapping:
-                continue
-            doc = self.document_type_mapping[fext](
-                path=os.path.join(path_to_search, fpath),
+        locale_codes = [locale.code for locale in self.locales]
+        locales = dict((locale.code, locale) for locale in self.locales)
+        discovered_files = scan_files(
+            root=self.source_path,
+            path=os.path.relpath(path_to_search, self.source_path),
+            extensions=self.document_type_mapping,
+            ignore_rules=self.ignore_rules,
+        )
+        for discovered in discovered_files:
+            fext = os.path.splitext(discovered.path)[1]
+            relative_dir = os.path.relpath(os.path.dirname(discovered.path), path_to_search)
+
+            # Translations are dated in their own locale's format.
+            locale = locales.get(locale_of(discovered.path, locale_codes), self.locales[0])
+            load = functools.partial(
+                self.document_type_mapping[fext],
+                path=discovered.path,
                 type=document_type,
-                site_config=self.site_vars
+                site_config=self.site_vars,
+                relative_dir='' if relative_dir == os.curdir else relative_dir,
+                stat=discovered.stat,
+                time_format=locale.site_vars.get('time_format'),
             )
+            if self.site_model is not None:
+                doc = self.site_model.document(discovered.path, discovered.stat, load)
+            else:
+                doc = load()
+            doc.locale = locale.code
             documents.append(doc)
 
         return documents
 
-    def _generate_navbar(self, *args):
+    def _generate_navbar(self, site_vars, *args):
         """
         Accept lists of pages, and assemble them into a list of things
             for the navbar.
 
         Args:
-            *args (lists):  Anything I want to consider for the navbar.
+            site_vars (dict):   The site variables to read "nav_items" from.
+            *args (lists):      Anything I want to consider for the navbar.
         """
         navbar = []
         # These are set explicitly by the user, so we want to preserve
         #   any order that is set here.
-        config_nav_items = self.site_vars.get('nav_items', [])
+        config_nav_items = site_vars.get('nav_items', [])
 
         # Pull the titles out of the configured nav items, so I don't
         #   add any poge twice. Meaning, if the user has manually added
@@ -334,7 +1085,9 @@ class Stasipy(object):
         for doc_list in args:
             docs += doc_list
 
-        for doc in sorted(docs):
+        # Documents come out of discovery sorted by path, pages before meta
+        #   pages, so the navbar order is stable between builds.
+        for doc in docs:
             if not doc.navbar or doc.title in config_nav_titles:
                 continue
             navbar.append(
@@ -369,7 +1122,7 @@ class Stasipy(object):
         if not self.verbose_mode or not msg:
             return
 
-        print msg
+        print(msg)
 
     def _confirm_dialog(self, msg, default='n'):
         """
@@ -387,9 +1140,3 @@ class Stasipy(object):
             return True
         else:
             return utils.confirm_dialog(msg, default=default)
-
-    def _clean(self):
-        """
-        Clean up any files that may have been created.
-        """
-        utils.ensure_directory_absent(self.staging_path)
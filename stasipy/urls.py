@@ -0,0 +1,111 @@
+"""
+urls.py:
+    Lookups for where documents end up on the site.
+
+Author: Corwin Brown
+Date: 10/19/2026
+"""
+import os
+import posixpath
+
+from stasipy.errors import StasipyException
+from stasipy.locales import strip_locale
+
+# Stands in for a key that more than one document answers to.
+_AMBIGUOUS = object()
+
+
+class HrefIndex(object):
+    """
+    An index of every document's href, built once per build, so templates
+        can link to other documents with a dict lookup:
+
+        {{ url_for('post', 'sample_post') }}
+        {{ url_for('post', '2016/sample_post') }}
+        {{ url_for('post/sample_post.md') }}
+
+    On sites with locales, there's an index per locale, and a translated
+        document also answers to the path of the document it translates.
+
+    An instance is callable, and is exposed to templates as "url_for".
+    """
+
+    def __init__(self, documents, source_path):
+        """
+        Constructor
+
+        Args:
+            documents (list):       Every Document in the build.
+            source_path (str):      The site's "src" directory. Source
+                                        paths are looked up relative to
+                                        this.
+        """
+        self._documents = {}
+        for doc in documents:
+            source_relpath = os.path.relpath(doc.path, source_path).replace(os.sep, '/')
+            keys = set([
+                (doc.type, doc.name),
+                (doc.type, doc.relative_path),
+                (None, source_relpath),
+                (None, posixpath.join(doc.type, doc.relative_path)),
+                (None, strip_locale(source_relpath, doc.locale)),
+            ])
+            for key in keys:
+                self._add(key, doc)
+
+    def _add(self, key, doc):
+        """
+        Add a key to the index, marking it as ambiguous if another document
+            already answers to it.
+        """
+        existing = self._documents.get(key)
+        if existing is not None and (existing is _AMBIGUOUS or existing.href != doc.href):
+            self._documents[key] = _AMBIGUOUS
+        elif existing is None:
+            self._documents[key] = doc
+
+    def __call__(self, type_or_path, name=None):
+        """
+        Look up a document's href.
+
+        Args:
+            type_or_path (str):     A document type (like "post") if name
+                                        is given, otherwise a path relative
+                                        to "src", with or without its
+                                        extension.
+            name (str):             The document's name, or its path
+                                        relative to its type's directory.
+
+        Returns:
+            str
+
+        Raises:
+            StasipyException if no document (or more than one) matches.
+        """
+        return self.find(type_or_path, name, caller='url_for').href
+
+    def find(self, type_or_path, name=None, caller='find'):
+        """
+        Look up a document. Takes the same arguments as looking up an href.
+
+        Args:
+            caller (str):   What to blame in error messages.
+
+        Returns:
+            Document
+        """
+        if name is None:
+            key = (None, type_or_path.lstrip('/'))
+            description = '"{0}"'.format(type_or_path)
+        else:
+            key = (type_or_path, name)
+            description = '{0} "{1}"'.format(type_or_path, name)
+
+        doc = self._documents.get(key)
+        if doc is None:
+            raise StasipyException('{0}: No document found for {1}!'.format(caller, description))
+        if doc is _AMBIGUOUS:
+            raise StasipyException('{0}: More than one document matches {1}! Use its full path.'
+                                   .format(caller, description))
+
+        return doc
@@ -5,18 +5,37 @@ utils.py:
 Author: Corwin Brown
 Date: 05/01/2016
 """
-from __future__ import absolute_import, print_function
-
 import os
 import re
 import sys
 import shutil
+import json
+import hashlib
+import tempfile
+import threading
+from collections import ChainMap
 
-import jinja2 as j2
-from markdown2 import markdown
-
+from stasipy.cache import MarkdownCache
 from stasipy.errors import StasipyException
 
+# Jinja2 and markdown2 are imported by the functions that need them, so
+#   commands that never render anything don't pay to load them.
+
+# Jinja environments are expensive to build, and each one keeps its own
+#   cache of compiled templates, so they are shared for the life of the
+#   process. Keyed by templates path.
+_template_environments = {}
+_template_environments_lock = threading.Lock()
+
+# Markdown converters reset themselves on every conversion, so they can be
+#   reused, just not shared between threads.
+_markdown_converters = threading.local()
+_markdown_extras = ['metadata']
+
+# Set by "configure_markdown_cache". None means every conversion is done
+#   from scratch.
+_markdown_cache = None
+
 
 def get_file_path(fname=None):
     """
@@ -100,6 +119,42 @@ def list_files(path):
             yield os.path.join(root, filename)
 
 
+def hash_content(content):
+    """
+    Get a hex digest of some content.
+
+    Args:
+        content (str):  The content to hash. Unicode will be encoded
+                            as utf-8 first.
+
+    Returns:
+        str
+    """
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+
+    return hashlib.sha1(content).hexdigest()
+
+
+def hash_file(fpath, block_size=65536):
+    """
+    Get a hex digest of a file's contents.
+
+    Args:
+        fpath (str):        The path of the file to hash.
+        block_size (int):   How much of the file to read at a time.
+
+    Returns:
+        str
+    """
+    digest = hashlib.sha1()
+    with open(fpath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
 def touch(fpath, times=None):
     """
     Python implementation of 'touch'.
@@ -114,6 +169,47 @@ def touch(fpath, times=None):
         os.utime(fpath, times)
 
 
+def write_json_atomic(fpath, data, **kwargs):
+    """
+    Write some JSON atomically. See "write_text_atomic".
+
+    Args:
+        fpath (str):        Where the file should end up.
+        data (object):      What to write.
+        kwargs (dict):      Passed on to "json.dumps".
+    """
+    write_text_atomic(fpath, json.dumps(data, **kwargs))
+
+
+def write_text_atomic(fpath, text):
+    """
+    Write some text to a uniquely named temp file next to where it's going,
+        then rename it into place, so readers (and anyone else writing it
+        at the same time) only ever see a complete file.
+
+    Args:
+        fpath (str):        Where the file should end up.
+        text (str):         What to write.
+    """
+    dir_path = os.path.dirname(os.path.abspath(fpath))
+    ensure_directory_exists(dir_path)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix='.{0}.'.format(os.path.basename(fpath)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        # mkstemp creates files only we can read, so give it the mode a
+        #   normally created file would have gotten.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, fpath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def confirm_dialog(msg, default=None):
     """
     Display a "yes/no" confirm dialog to the user.
@@ -131,7 +227,7 @@ def confirm_dialog(msg, default=None):
 
     prompt = '{0}: '.format(msg)
     while True:
-        confirm = raw_input(prompt).lower()
+        confirm = input(prompt).lower()
         if not confirm and default is not None:
             confirm = default.lower()
 
@@ -157,6 +253,33 @@ def make_singular(s):
         return s
 
 
+def parse_terms(value):
+    """
+    Normalize taxonomy metadata (like "tags") into a list of terms. The
+        metadata may be a list, or a comma separated string, with or without
+        brackets ("[a, b]" comes through the metadata parser as a string).
+
+    Args:
+        value (list|str):   The metadata.
+
+    Returns:
+        list:   The terms, stripped, without blanks or duplicates, in the
+                    order they were given.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.strip().strip('[]').split(',')
+
+    terms = []
+    for term in value:
+        term = str(term).strip()
+        if term and term not in terms:
+            terms.append(term)
+
+    return terms
+
+
 def parse_markdown_from_file(fpath):
     """
     Parse a markdown file.
@@ -169,35 +292,36 @@ def parse_markdown_from_file(fpath):
     """
     if not file_exists(fpath):
         raise ValueError('Unable to read file at location: {0}'.format(fpath))
-    with open(fpath, 'r') as f:
+    with open(fpath, 'r', encoding='utf-8') as f:
         metadata, content = parse_markdown(f.read())
 
     return metadata, content
 
 
-def parse_markdown_template(fpath, **kwargs):
+def parse_markdown_template(fpath, context=None, **kwargs):
     """
     Parse a markdown file, but treat it like a JINJA2 template.
 
     Args:
         fpath (str):        The path of the file to parse.
+        context (mapping):  Variables to render into the template.
+        kwargs (dict):      Any other variables you wish to render into
+                                the template. These win over context.
 
     Returns:
         Tuple:              (metadata, content)
     """
     if not file_exists(fpath):
         raise ValueError('Unable to read file at location: {0}'.format(fpath))
-    with open(fpath, 'r') as f:
+    with open(fpath, 'r', encoding='utf-8') as f:
         fpath_contents = f.read()
 
     # Get the document metadata, so it can appear in the content.
     metadata, _ = parse_markdown(fpath_contents)
 
-    # Update our kwargs with the metadata
-    kwargs.update(metadata)
-
-    # Template, and render the templated markdown
-    templated_content = render_template_from_string(fpath_contents, **kwargs)
+    # Template, and render the templated markdown, with the metadata
+    #   layered over everything else.
+    templated_content = render_template_from_string(fpath_contents, ChainMap(metadata, kwargs, context or {}))
     _, content = parse_markdown(templated_content)
 
     return metadata, content
@@ -213,8 +337,14 @@ def parse_markdown(md_content, metadata_lowercase=True):
     Returns:
         Tuple:              (metadata, content)
     """
-    content = markdown(md_content, extras=['metadata'])
-    metadata = content.metadata
+    cached = _markdown_cache.get(md_content) if _markdown_cache is not None else None
+    if cached is not None:
+        metadata, content = cached
+    else:
+        content = get_markdown_converter().convert(md_content)
+        metadata = content.metadata
+        if _markdown_cache is not None:
+            _markdown_cache.put(md_content, metadata, content)
 
     if metadata_lowercase:
         metadata = {k.lower(): v for k, v in metadata.items()}
@@ -222,39 +352,172 @@ def parse_markdown(md_content, metadata_lowercase=True):
     return metadata, content
 
 
-def render_template_from_file(templates_path, template_name, **kwargs):
+def get_markdown_converter():
+    """
+    Get the Markdown converter for the current thread, creating it the
+        first time it's asked for.
+
+    Returns:
+        markdown2.Markdown
+    """
+    converter = getattr(_markdown_converters, 'converter', None)
+    if converter is None:
+        from markdown2 import Markdown
+        converter = Markdown(extras=_markdown_extras)
+        _markdown_converters.converter = converter
+
+    return converter
+
+
+def configure_markdown_cache(path, max_size):
+    """
+    Cache Markdown conversions on disk, for every "parse_markdown" call
+        from here on.
+
+    Args:
+        path (str):         The cache directory. None turns caching off.
+        max_size (int):     How large the cache may grow, in bytes.
+
+    Returns:
+        MarkdownCache, or None if caching is off.
+    """
+    global _markdown_cache
+
+    if path is None:
+        _markdown_cache = None
+    else:
+        import markdown2
+        engine = 'markdown2 {0} extras={1}'.format(markdown2.__version__, ','.join(sorted(_markdown_extras)))
+        _markdown_cache = MarkdownCache(path, max_size, engine)
+
+    return _markdown_cache
+
+
+def get_template_environment(templates_path=None, bytecode_cache_path=None):
+    """
+    Get the shared Jinja environment for a templates path, creating it the
+        first time it's asked for.
+
+    Args:
+        templates_path (str):       The search path for templates. If None,
+                                        the environment will only be able
+                                        to render templates from strings.
+        bytecode_cache_path (str):  Where to keep compiled templates between
+                                        runs. Only used when the environment
+                                        is created.
+
+    Returns:
+        jinja2.Environment
+    """
+    with _template_environments_lock:
+        env = _template_environments.get(templates_path)
+        if env is None:
+            import jinja2 as j2
+            from stasipy.extensions import FragmentCacheExtension
+
+            if templates_path is None:
+                env = j2.Environment(extensions=[FragmentCacheExtension])
+            else:
+                bytecode_cache = None
+                if bytecode_cache_path is not None:
+                    ensure_directory_exists(bytecode_cache_path)
+                    bytecode_cache = j2.FileSystemBytecodeCache(bytecode_cache_path)
+                env = j2.Environment(loader=j2.FileSystemLoader(templates_path),
+                                     extensions=[FragmentCacheExtension],
+                                     bytecode_cache=bytecode_cache)
+            _template_environments[templates_path] = env
+
+    return env
+
+
+def compile_templates(templates_path, bytecode_cache_path):
+    """
+    Compile every template in a templates path ahead of time. Compiled
+        templates are kept in the bytecode cache, and reused by later runs
+        until their source changes.
+
+    Args:
+        templates_path (str):       The search path for templates.
+        bytecode_cache_path (str):  Where to keep compiled templates.
+
+    Returns:
+        int:    How many templates were loaded.
+    """
+    env = get_template_environment(templates_path, bytecode_cache_path)
+    template_names = env.list_templates(extensions=['j2'])
+    for template_name in template_names:
+        env.get_template(template_name)
+
+    return len(template_names)
+
+
+def render_template_from_file(templates_path, template_name, context=None, **kwargs):
     """
     Render a JINJA template from a file.
 
     Args:
         templates_path (str):   The search path for templates.
         template_name (str):    The template to render.
+        context (mapping):      Variables to render into the template.
         kwargs (dict):          Any other variables you wish to render into
-                                    the template.
+                                    the template. These win over context.
 
     Returns:
         str (Rendered Template)
     """
-    env = j2.Environment(loader=j2.FileSystemLoader(templates_path))
+    env = get_template_environment(templates_path)
     template = env.get_template(template_name)
-    return template.render(kwargs)
+    return render_template(template, context, **kwargs)
 
 
-def render_template_from_string(template_string, **kwargs):
+def render_template_from_string(template_string, context=None, **kwargs):
     """
     Render a template from a string.
 
     Args:
         template_string (str):      The template to use.
+        context (mapping):          Variables to render into the template.
         kwargs (dict):              Any other variables you wish to render
-                                        into the template.
+                                        into the template. These win over
+                                        context.
 
     Returns:
         str (Rendered Template)
     """
-    env = j2.Environment()
+    env = get_template_environment()
     template = env.from_string(template_string)
-    return template.render(kwargs)
+    return render_template(template, context, **kwargs)
+
+
+def render_template(template, context=None, **kwargs):
+    """
+    Render a template against a mapping, without copying it.
+
+    "Template.render" copies every variable into a fresh dict before
+        rendering. Handing Jinja a "shared" context instead lets it look
+        variables up straight out of a ChainMap of layers (document, section,
+        site), so the cost of rendering doesn't depend on how big those
+        layers are.
+
+    Args:
+        template (jinja2.Template):     The template to render.
+        context (mapping):              Variables to render into the
+                                            template.
+        kwargs (dict):                  Any other variables you wish to
+                                            render into the template. These
+                                            win over context.
+
+    Returns:
+        str (Rendered Template)
+    """
+    # Shared contexts skip the template globals (range, dict, etc), so they
+    #   go in as the bottom layer.
+    layers = ChainMap(kwargs, context or {}, template.globals)
+    template_context = template.new_context(layers, shared=True)
+    try:
+        return template.environment.concat(template.root_render_func(template_context))
+    except Exception:
+        return template.environment.handle_exception()
 
 
 def remove_markdown_metadata(md_content):